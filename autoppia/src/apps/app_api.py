@@ -1,19 +1,32 @@
-from typing import Dict, Optional, Any, Set
+from typing import Dict, Optional, Any
+import itertools
 import json
 import logging
-import threading
 import asyncio
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
-from fastapi.responses import JSONResponse
 import uvicorn
 from autoppia.src.workers.worker_api import WorkerAPI
+from autoppia.src.workers.models import decode_json, encode_json
 from autoppia.src.apps.interface import AIApp
-from autoppia.src.workers.interface import AIWorker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("AppAPI")
 
+# Queued after the last streamed chunk to signal that call_stream has returned
+_STREAM_END = object()
+
+# Upper bound on the text coalesced into a single "stream" frame
+_STREAM_BATCH_CHARS = 16 * 1024
+
+# Text stream frames only differ in their content, which is spliced into this
+# skeleton instead of encoding a fresh envelope per chunk
+_STREAM_TEXT_FRAME = '{"type":"stream","data":{"content":%s}}'
+
+# Acknowledgement sent for every incoming message; it never changes, so it is
+# serialized once
+_ACK_FRAME = encode_json({"type": "response", "data": {"response": "Hello! I received your message"}})
+
 
 class AppAPI(WorkerAPI):
     """
@@ -28,7 +41,7 @@ class AppAPI(WorkerAPI):
         api: The FastAPI instance
         active_connections: Dictionary of active WebSocket connections
     """
-    def __init__(self, app: AIApp, host="localhost", port=8000):
+    def __init__(self, app: AIApp, host="localhost", port=8000, worker_concurrency: int = 10):
         """
         Initialize the AppAPI.
         
@@ -36,11 +49,23 @@ class AppAPI(WorkerAPI):
             app: App instance that will process messages
             host (str): Host to bind the server to
             port (int): Port to listen on
+            worker_concurrency (int): Number of app calls that can run at once
+                across all clients
         """
-        super().__init__(worker=app, host=host, port=port)
+        if app is None:
+            raise ValueError("AppAPI requires an app")
+        super().__init__(worker=app, host=host, port=port, worker_concurrency=worker_concurrency)
         self.app = app  # Store a reference to the app for app-specific operations
+        # The app's entry points never change, so they are resolved once
+        # rather than looked up on every message
+        self._app_call_stream = getattr(app, "call_stream", None)
+        self._app_route_message = getattr(app, "route_message", None)
+        self._app_call = getattr(app, "call", None)
         self.api = FastAPI()
         self.active_connections = {}
+        # Connection ids come from a counter; id(websocket) can be reused by
+        # a new socket while tasks for the old one are still running
+        self._client_ids = itertools.count(1)
         
         # Register HTTP endpoints
         self.api.get("/app_info")(self.handle_get_app_info_http)
@@ -49,217 +74,316 @@ class AppAPI(WorkerAPI):
         
         # Register WebSocket endpoint
         self.api.websocket("/ws")(self.websocket_endpoint)
+        
+        # WebSocket actions, resolved with a single lookup per message
+        self._action_handlers = {
+            "get_app_info": self.handle_get_app_info_ws,
+            "get_ui_config": self.handle_get_ui_config_ws,
+            "get_workers": self.handle_get_workers_ws,
+        }
+        
+        # app_info/ui_config/workers rarely change, so each is computed once
+        # and kept both as data (HTTP) and as a serialized frame (WebSocket).
+        # The cache is dropped whenever the app's set of workers changes (e.g.
+        # after register_worker) or when invalidate_info() is called.
+        self._info_sources = {
+            "app_info": lambda: self.app.get_app_info(),
+            "ui_config": lambda: self.app.get_ui_config(),
+            "workers": lambda: {name: {"name": name} for name in self.app.get_workers()},
+        }
+        self._info_data: Dict[str, Dict[str, Any]] = {}
+        self._info_frames: Dict[str, str] = {}
+        self._info_workers: Optional[tuple] = None
+    
+    def invalidate_info(self):
+        """Drop cached app_info/ui_config/workers so they are recomputed on next request"""
+        self._info_data.clear()
+        self._info_frames.clear()
+        self._info_workers = None
+    
+    def _check_info_workers(self):
+        """Invalidate the info cache if workers were added or removed since it was built"""
+        workers = tuple(self.app.get_workers())
+        if workers != self._info_workers:
+            self.invalidate_info()
+            self._info_workers = workers
+    
+    def _get_info(self, kind: str) -> Dict[str, Any]:
+        """Return the cached ``{kind: ...}`` response data, computing it on a miss"""
+        self._check_info_workers()
+        data = self._info_data.get(kind)
+        if data is None:
+            data = {kind: self._info_sources[kind]()}
+            self._info_data[kind] = data
+        return data
+    
+    def _get_info_frame(self, kind: str) -> str:
+        """Return the cached serialized WebSocket frame for ``kind``"""
+        self._check_info_workers()
+        frame = self._info_frames.get(kind)
+        if frame is None:
+            frame = encode_json({"type": kind, "data": self._get_info(kind)})
+            self._info_frames[kind] = frame
+        return frame
     
     async def websocket_endpoint(self, websocket: WebSocket):
         """Handle WebSocket connections and messages"""
         await websocket.accept()
-        client_id = str(id(websocket))
+        client_id = str(next(self._client_ids))
         self.active_connections[client_id] = websocket
+        # App calls from one client are handled in arrival order so their
+        # streams do not interleave; different clients still run in parallel.
+        # Action requests (app_info, ui_config, workers) skip this lock and
+        # are answered even while a long call_stream is running.
+        ordering = asyncio.Lock()
         
         try:
             while True:
-                data = await websocket.receive_text()
+                # Text and binary frames are both accepted; orjson parses
+                # bytes directly, so binary payloads are never decoded to str
+                frame = await websocket.receive()
+                if frame["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(frame.get("code", 1000))
+                data = frame.get("text")
+                if data is None:
+                    data = frame.get("bytes")
                 # Process the message asynchronously
-                asyncio.create_task(self.handle_message(client_id, data))
+                asyncio.create_task(self.handle_message(client_id, data, ordering))
         except WebSocketDisconnect:
-            logger.info(f"Client {client_id} disconnected")
-            if client_id in self.active_connections:
-                del self.active_connections[client_id]
+            logger.info("Client %s disconnected", client_id)
+            self.active_connections.pop(client_id, None)
         except Exception as e:
-            logger.error(f"WebSocket error: {e}", exc_info=True)
-            if client_id in self.active_connections:
-                del self.active_connections[client_id]
+            logger.error("WebSocket error: %s", e, exc_info=True)
+            self.active_connections.pop(client_id, None)
     
-    async def handle_message(self, client_id, data):
-        """Handle messages from clients with worker routing"""
+    async def handle_message(self, client_id, data, ordering: Optional[asyncio.Lock] = None):
+        """
+        Handle messages from clients with worker routing
+        
+        Args:
+            client_id: Id of the connection the message arrived on
+            data: Raw frame (str or bytes) or an already decoded message
+            ordering: Per-client lock held while the app handles the message,
+                so calls from one client run in arrival order. Action requests
+                are answered without waiting for it.
+        """
         try:
-            if not isinstance(data, dict):
+            if type(data) is not dict:
                 try:
-                    data = json.loads(data)
+                    data = decode_json(data)
                 except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON received: {e}")
+                    logger.error("Invalid JSON received: %s", e)
                     await self._send_message(client_id, "error", {"error": f"Invalid JSON: {str(e)}"})
                     return
-            
-            if not self.app:
-                logger.error("App not initialized")
-                await self._send_message(client_id, "error", {"error": "App not initialized"})
-                return
-            
-            # Check if this is an action request
-            if "action" in data:
-                action = data.get("action")
-                
-                if action == "get_app_info":
-                    await self.handle_get_app_info_ws(client_id, data)
-                    return
-                elif action == "get_ui_config":
-                    await self.handle_get_ui_config_ws(client_id, data)
-                    return
-                elif action == "get_workers":
-                    await self.handle_get_workers_ws(client_id, data)
+                if not isinstance(data, dict):
+                    await self._send_message(client_id, "error", {"error": "Invalid message: expected a JSON object"})
                     return
             
-            # Extract message and optional worker name
-            message = data.get("message", "")
-            worker_name = data.get("worker")
+            # Check if this is an action request
+            handler = self._action_handlers.get(data.get("action"))
+            if handler is not None:
+                await handler(client_id, data)
+                return
             
-            logger.info(f"Received message from {client_id}: {message[:50]}...")
-            if worker_name:
-                logger.info(f"Routing to worker: {worker_name}")
+            # App calls from one client run one at a time, in arrival order
+            if ordering is None:
+                await self._handle_app_message(client_id, data)
+            else:
+                async with ordering:
+                    await self._handle_app_message(client_id, data)
+        except Exception as e:
+            logger.error("Error processing message: %s", e, exc_info=True)
+            try:
+                await self._send_message(client_id, "error", {"error": str(e)})
+            except Exception as send_err:
+                logger.error("Error sending error message: %s", send_err)
+    
+    async def _handle_app_message(self, client_id, data: Dict[str, Any]):
+        """Pass a chat message to the app and send its stream and result to the client"""
+        # Extract message and optional worker name
+        message = data.get("message", "")
+        worker_name = data.get("worker")
+        
+        logger.info("Received message from %s: %.50s...", client_id, message)
+        if worker_name:
+            logger.info("Routing to worker: %s", worker_name)
+        
+        # Acknowledge receipt
+        await self._send_raw(client_id, _ACK_FRAME)
+        
+        # Check if the app supports streaming
+        call_stream = self._app_call_stream
+        if call_stream is not None:
+            # call_stream runs on a worker thread and invokes its callback
+            # synchronously, so chunks are handed to the event loop through
+            # a queue and sent in order by a single forwarding task.
+            loop = asyncio.get_running_loop()
+            chunks: asyncio.Queue = asyncio.Queue()
             
-            # Acknowledge receipt
-            await self._send_message(client_id, "response", {"response": "Hello! I received your message"})
+            def send_message(msg):
+                """Hand a streamed chunk from the app thread to the event loop"""
+                loop.call_soon_threadsafe(chunks.put_nowait, msg)
             
-            # Check if the app supports streaming
-            if hasattr(self.app, 'call_stream'):
-                async def send_message(msg):
-                    """Asynchronous message sending wrapper"""
-                    logger.info(f"Sending message via send_message: {str(msg)[:100]}...")
-                    
-                    try:
-                        await self._send_message(client_id, "stream", {"content": msg})
-                    except Exception as e:
-                        logger.error(f"Error in send_message: {e}", exc_info=True)
-                
-                # Use streaming call with async sending
-                logger.info("Starting streaming call")
-                result = await self._run_in_thread(
-                    self.app.call_stream, message, send_message, worker_name if worker_name else None
-                )
+            async def forward(msg):
+                """Send one stream frame to the client"""
+                logger.debug("Sending message via send_message: %.100s...", msg)
                 
-                # Send completion message
                 try:
-                    if result is not None:
-                        await self._send_message(client_id, "complete", {"complete": True, "result": result})
+                    if type(msg) is str:
+                        await self._send_raw(client_id, _STREAM_TEXT_FRAME % encode_json(msg))
                     else:
-                        await self._send_message(client_id, "complete", {"complete": True})
-                    logger.info("Streaming call completed")
+                        await self._send_message(client_id, "stream", {"content": msg})
                 except Exception as e:
-                    logger.error(f"Error sending completion message: {e}")
-            else:
-                # Fallback to non-streaming call
-                logger.info("Starting non-streaming call")
-                if worker_name:
-                    result = await self._run_in_thread(self.app.route_message, message, worker_name)
-                else:
-                    result = await self._run_in_thread(self.app.call, message)
-                await self._send_message(client_id, "result", {"result": result})
-                logger.info("Non-streaming call completed")
-        except Exception as e:
-            logger.error(f"Error processing message: {e}", exc_info=True)
+                    logger.error("Error in send_message: %s", e, exc_info=True)
+            
+            async def forward_chunks():
+                """Send queued chunks to the client until the stream ends"""
+                flush_interval = self.stream_flush_interval
+                while True:
+                    msg = await chunks.get()
+                    if msg is _STREAM_END:
+                        return
+                    if not isinstance(msg, str) or flush_interval <= 0:
+                        await forward(msg)
+                        continue
+                    
+                    # Give the app a moment to produce more text, then send
+                    # everything queued so far as one frame. Non-text chunks
+                    # end the batch so ordering is preserved.
+                    await asyncio.sleep(flush_interval)
+                    parts = [msg]
+                    size = len(msg)
+                    tail = None
+                    while size < _STREAM_BATCH_CHARS and not chunks.empty():
+                        msg = chunks.get_nowait()
+                        if not isinstance(msg, str):
+                            tail = msg
+                            break
+                        parts.append(msg)
+                        size += len(msg)
+                    await forward("".join(parts))
+                    if tail is _STREAM_END:
+                        return
+                    if tail is not None:
+                        await forward(tail)
+            
+            def run_stream():
+                try:
+                    return call_stream(message, send_message, worker_name if worker_name else None)
+                finally:
+                    loop.call_soon_threadsafe(chunks.put_nowait, _STREAM_END)
+            
+            # Use streaming call with async sending
+            logger.info("Starting streaming call")
+            forwarder = asyncio.create_task(forward_chunks())
             try:
-                await self._send_message(client_id, "error", {"error": str(e)})
-            except Exception as send_err:
-                logger.error(f"Error sending error message: {send_err}")
+                result = await self._run_in_thread(run_stream)
+            finally:
+                await forwarder
+            
+            # Send completion message
+            try:
+                if result is not None:
+                    await self._send_message(client_id, "complete", {"complete": True, "result": result})
+                else:
+                    await self._send_message(client_id, "complete", {"complete": True})
+                logger.info("Streaming call completed")
+            except Exception as e:
+                logger.error("Error sending completion message: %s", e)
+        else:
+            # Fallback to non-streaming call
+            logger.info("Starting non-streaming call")
+            if worker_name:
+                result = await self._run_in_thread(self._app_route_message, message, worker_name)
+            else:
+                result = await self._run_in_thread(self._app_call, message)
+            await self._send_message(client_id, "result", {"result": result})
+            logger.info("Non-streaming call completed")
     
     async def _send_message(self, client_id, event_type, data):
         """Send a message to a client via WebSocket"""
-        if client_id in self.active_connections:
-            websocket = self.active_connections[client_id]
-            message = {"type": event_type, "data": data}
-            await websocket.send_text(json.dumps(message))
+        await self._send_raw(client_id, encode_json({"type": event_type, "data": data}))
+    
+    async def _send_raw(self, client_id, payload: str):
+        """Send an already serialized message to a client via WebSocket"""
+        websocket = self.active_connections.get(client_id)
+        if websocket is not None:
+            await websocket.send_text(payload)
     
     async def _run_in_thread(self, func, *args, **kwargs):
-        """Run a blocking function in a thread pool"""
+        """Run a blocking function in the worker thread pool"""
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
     
     # HTTP endpoint handlers
     async def handle_get_app_info_http(self, request: Request):
         """HTTP endpoint for app information"""
         try:
-            if not self.app:
-                raise HTTPException(status_code=500, detail="App not initialized")
-            
-            app_info = self.app.get_app_info()
-            return {"app_info": app_info}
+            return self._get_info("app_info")
         except Exception as e:
-            logger.error(f"Error getting app info: {e}", exc_info=True)
+            logger.error("Error getting app info: %s", e, exc_info=True)
             raise HTTPException(status_code=500, detail=str(e))
     
     async def handle_get_ui_config_http(self, request: Request):
         """HTTP endpoint for UI configuration"""
         try:
-            if not self.app:
-                raise HTTPException(status_code=500, detail="App not initialized")
-            
-            ui_config = self.app.get_ui_config()
-            return {"ui_config": ui_config}
+            return self._get_info("ui_config")
         except Exception as e:
-            logger.error(f"Error getting UI config: {e}", exc_info=True)
+            logger.error("Error getting UI config: %s", e, exc_info=True)
             raise HTTPException(status_code=500, detail=str(e))
     
     async def handle_get_workers_http(self, request: Request):
         """HTTP endpoint for worker information"""
         try:
-            if not self.app:
-                raise HTTPException(status_code=500, detail="App not initialized")
-            
-            workers = self.app.get_workers()
-            worker_info = {name: {"name": name} for name in workers.keys()}
-            return {"workers": worker_info}
+            return self._get_info("workers")
         except Exception as e:
-            logger.error(f"Error getting workers: {e}", exc_info=True)
+            logger.error("Error getting workers: %s", e, exc_info=True)
             raise HTTPException(status_code=500, detail=str(e))
     
     # WebSocket event handlers
     async def handle_get_app_info_ws(self, client_id, data):
         """WebSocket handler for app information"""
         try:
-            if not self.app:
-                logger.error("App not initialized")
-                await self._send_message(client_id, "error", {"error": "App not initialized"})
-                return
-            
-            app_info = self.app.get_app_info()
-            await self._send_message(client_id, "app_info", {"app_info": app_info})
+            await self._send_raw(client_id, self._get_info_frame("app_info"))
             logger.info("Sent app info")
         except Exception as e:
-            logger.error(f"Error getting app info: {e}", exc_info=True)
+            logger.error("Error getting app info: %s", e, exc_info=True)
             try:
                 await self._send_message(client_id, "error", {"error": str(e)})
             except Exception as send_err:
-                logger.error(f"Error sending error message: {send_err}")
+                logger.error("Error sending error message: %s", send_err)
     
     async def handle_get_ui_config_ws(self, client_id, data):
         """WebSocket handler for UI configuration"""
         try:
-            if not self.app:
-                logger.error("App not initialized")
-                await self._send_message(client_id, "error", {"error": "App not initialized"})
-                return
-            
-            ui_config = self.app.get_ui_config()
-            await self._send_message(client_id, "ui_config", {"ui_config": ui_config})
+            await self._send_raw(client_id, self._get_info_frame("ui_config"))
             logger.info("Sent UI config")
         except Exception as e:
-            logger.error(f"Error getting UI config: {e}", exc_info=True)
+            logger.error("Error getting UI config: %s", e, exc_info=True)
             try:
                 await self._send_message(client_id, "error", {"error": str(e)})
             except Exception as send_err:
-                logger.error(f"Error sending error message: {send_err}")
+                logger.error("Error sending error message: %s", send_err)
     
     async def handle_get_workers_ws(self, client_id, data):
         """WebSocket handler for worker information"""
         try:
-            if not self.app:
-                logger.error("App not initialized")
-                await self._send_message(client_id, "error", {"error": "App not initialized"})
-                return
-            
-            workers = self.app.get_workers()
-            worker_info = {name: {"name": name} for name in workers.keys()}
-            await self._send_message(client_id, "workers", {"workers": worker_info})
-            logger.info(f"Sent worker info for {len(worker_info)} workers")
+            await self._send_raw(client_id, self._get_info_frame("workers"))
+            logger.info("Sent worker info for %d workers", len(self._get_info("workers")["workers"]))
         except Exception as e:
-            logger.error(f"Error getting workers: {e}", exc_info=True)
+            logger.error("Error getting workers: %s", e, exc_info=True)
             try:
                 await self._send_message(client_id, "error", {"error": str(e)})
             except Exception as send_err:
-                logger.error(f"Error sending error message: {send_err}")
+                logger.error("Error sending error message: %s", send_err)
     
     def start(self):
         """Start the FastAPI server"""
-        logger.info(f"Starting FastAPI server on {self.host}:{self.port}")
-        uvicorn.run(self.api, host=self.host, port=self.port)
+        logger.info("Starting FastAPI server on %s:%s", self.host, self.port)
+        # loop/http="auto" resolve to uvloop and httptools when installed
+        # (both are in requirements.txt), falling back to asyncio/h11 otherwise
+        uvicorn.run(self.api, host=self.host, port=self.port, loop="auto", http="auto")
+    
+    def run(self):
+        """Start the FastAPI server and block until it stops"""
+        self.start()
@@ -1,8 +1,11 @@
-import json
 import logging
 import requests
+import threading
 import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Optional, Any, Callable
+from autoppia.src.workers.models import encode_json
 from autoppia.src.workers.router import WorkerRouter
 
 # Configure logging
@@ -17,29 +20,60 @@ class AppRouter(WorkerRouter):
     application-specific operations.
     """
 
+    # Keep-alive session shared by all routers for info endpoint lookups
+    _shared_session: Optional[requests.Session] = None
+    _session_lock = threading.Lock()
+
+    # app_id -> (expiry, ip, port) from recent info endpoint lookups
+    _info_cache: Dict[Any, tuple] = {}
+    info_cache_ttl = 60  # seconds
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        """Return the shared pooled session, creating it on first use"""
+        if cls._shared_session is None:
+            with cls._session_lock:
+                if cls._shared_session is None:
+                    retry_strategy = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+                    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry_strategy)
+                    session = requests.Session()
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    cls._shared_session = session
+        return cls._shared_session
+
     @classmethod
     def from_id(cls, app_id: int):
-        """Fetches app IP and port from the info endpoint"""
+        """Fetches app IP and port from the info endpoint
+        
+        Lookups are cached per app_id for info_cache_ttl seconds, so building
+        routers for the same app in a loop doesn't hit the endpoint each time.
+        """
+        cached = cls._info_cache.get(app_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cls(cached[1], cached[2])
+
         try:
             payload = {
                 "SECRET": "ekwklrklkfewf3232nm",
                 "id": app_id,
                 "type": "app"  # Specify that we're looking for an app, not a worker
             }
-            logger.info(f"Fetching app info for app_id: {app_id}")
-            response = requests.get("http://3.251.99.81/info", json=payload)
+            logger.info("Fetching app info for app_id: %s", app_id)
+            response = cls._get_session().get("http://3.251.99.81/info", json=payload, timeout=(3, 10))
             data = response.json()
-            logger.info(f"Received app info: {data}")
+            logger.info("Received app info: %s", data)
             ip = data.get("ip")
             port = data.get("port")
             
             if not ip or not port:
-                logger.error(f"Invalid response: missing ip or port. Response: {data}")
+                logger.error("Invalid response: missing ip or port. Response: %s", data)
                 raise ValueError("Invalid response: missing ip or port")
-                
+
+            cls._info_cache[app_id] = (time.monotonic() + cls.info_cache_ttl, ip, port)
             return cls(ip, port)
         except Exception as e:
-            logger.error(f"Failed to fetch app info: {str(e)}")
+            logger.error("Failed to fetch app info: %s", e)
             raise Exception(f"Failed to fetch app info: {str(e)}")
     
     def __init__(self, ip: str, port: int):
@@ -71,7 +105,7 @@ class AppRouter(WorkerRouter):
         }
         
         # Use the parent class's call method with the routed message
-        return super().call(json.dumps(routed_message), stream_callback, keep_alive)
+        return super().call(encode_json(routed_message), stream_callback, keep_alive)
     
     def get_app_info(self, stream_callback=None):
         """Retrieves information about the app.
@@ -86,7 +120,7 @@ class AppRouter(WorkerRouter):
             "action": "get_app_info"
         }
         
-        return super().call(json.dumps(info_request), stream_callback)
+        return super().call(encode_json(info_request), stream_callback)
     
     def get_ui_config(self, stream_callback=None):
         """Retrieves the UI configuration for the app.
@@ -101,7 +135,7 @@ class AppRouter(WorkerRouter):
             "action": "get_ui_config"
         }
         
-        return super().call(json.dumps(ui_request), stream_callback)
+        return super().call(encode_json(ui_request), stream_callback)
     
     def get_available_workers(self, stream_callback=None):
         """Retrieves a list of available workers in the app.
@@ -116,4 +150,4 @@ class AppRouter(WorkerRouter):
             "action": "get_workers"
         }
         
-        return super().call(json.dumps(workers_request), stream_callback)
+        return super().call(encode_json(workers_request), stream_callback)
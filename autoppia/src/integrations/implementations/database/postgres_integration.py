@@ -1,8 +1,12 @@
+import logging
 from typing import Optional
 from autoppia.src.integrations.implementations.database.interface import DatabaseIntegration
 from autoppia.src.integrations.config import IntegrationConfig
 from autoppia.src.integrations.implementations.base import Integration
-import psycopg2
+import threading
+from psycopg2.pool import ThreadedConnectionPool
+
+logger = logging.getLogger(__name__)
 
 
 class PostgresIntegration(DatabaseIntegration, Integration):
@@ -23,6 +27,10 @@ class PostgresIntegration(DatabaseIntegration, Integration):
                 - port: Database port number
                 - dbname: Database name
                 - password: Database password
+                - max_connections: Size of the connection pool (default 10)
+        
+        Raises:
+            ValueError: If max_connections is not a positive integer
         """
         self.integration_config = integration_config
         self.host = integration_config.attributes.get("host")
@@ -30,34 +38,92 @@ class PostgresIntegration(DatabaseIntegration, Integration):
         self.port = integration_config.attributes.get("port")
         self.dbname = integration_config.attributes.get("dbname")
         self._password = integration_config.attributes.get("password")
+        # Integration attributes usually arrive as strings
+        self.max_connections = int(integration_config.attributes.get("max_connections") or 10)
+        if self.max_connections < 1:
+            raise ValueError(f"max_connections must be at least 1, got {self.max_connections}")
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        # ThreadedConnectionPool raises instead of waiting when every
+        # connection is in use, so callers queue here for a free one
+        self._pool_slots = threading.BoundedSemaphore(self.max_connections)
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        """Create the connection pool on first use and return it."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(
+                        minconn=1,
+                        maxconn=self.max_connections,
+                        host=self.host,
+                        user=self.user,
+                        password=self._password,
+                        dbname=self.dbname,
+                        port=self.port,
+                    )
+        return self._pool
 
     def execute_sql(
         self,
         sql: str,
+        commit: bool = False,
     ):
         """Execute SQL query on PostgreSQL database and return results.
         
         Args:
             sql (str): SQL query to execute
+            commit (bool): Commit the transaction after a successful query.
+                Defaults to False, in which case it is rolled back and any
+                changes are discarded.
             
         Returns:
-            Optional[str]: Query results if successful, None if an error occurs
+            Optional[list]: Rows returned by the query (an empty list for
+                statements that return none, such as INSERT or DDL), or None
+                if an error occurs
             
         Note:
-            The connection is automatically closed after query execution,
-            regardless of success or failure.
+            Connections are taken from a pool shared by all calls on this
+            integration and returned to it after the query, so only the first
+            call pays for connecting to the server. When all max_connections
+            are in use, the call waits for one to be returned.
         """
+        self._pool_slots.acquire()
         try:
-            conn = psycopg2.connect(host=self.host, user=self.user, password=self._password, dbname=self.dbname)
-            cursor = conn.cursor()
-            cursor.execute(sql)
-            results = cursor.fetchall()
-            cursor.close()
-            conn.close()
-
-            return results
-        except Exception as e:
-            print(f"An error occurred: {e}")
-            return None
-
-    
\ No newline at end of file
+            try:
+                pool = self._get_pool()
+                conn = pool.getconn()
+            except Exception as e:
+                logger.error("Could not get a PostgreSQL connection: %s", e)
+                return None
+
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql)
+                    # Only statements that produce rows have a description;
+                    # fetchall() raises for the others
+                    results = cursor.fetchall() if cursor.description is not None else []
+                if commit:
+                    conn.commit()
+
+                return results
+            except Exception as e:
+                logger.error("PostgreSQL query failed: %s", e)
+                return None
+            finally:
+                # End the transaction so the connection goes back clean
+                try:
+                    conn.rollback()
+                except Exception:
+                    # The connection is unusable; it is discarded below
+                    pass
+                pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            self._pool_slots.release()
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
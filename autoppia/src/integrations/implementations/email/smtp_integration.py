@@ -1,7 +1,8 @@
+import base64
 import email
 import imaplib
 import smtplib
-from email import encoders
+import threading
 from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -10,6 +11,36 @@ from autoppia.src.integrations.implementations.email.interface import EmailInteg
 from autoppia.src.integrations.config import IntegrationConfig
 from autoppia.src.integrations.implementations.base import Integration
 
+# Attachments are read in multiples of 57 bytes, the input size of one 76
+# character base64 line, so the encoded chunks join into well-formed lines
+_ATTACHMENT_CHUNK_SIZE = 57 * 1024
+
+
+def _encode_attachment(path: str) -> str:
+    """Read a file and return its contents base64-encoded in MIME lines.
+
+    The file is encoded chunk by chunk as it is read, so the raw bytes are
+    never held in memory all at once.
+    """
+    parts = []
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_ATTACHMENT_CHUNK_SIZE), b""):
+            parts.append(base64.encodebytes(chunk).decode("ascii"))
+    return "".join(parts)
+
+
+def _decode_body(part: email.message.Message) -> str:
+    """Return the text of a message part, decoded with its declared charset."""
+    payload = part.get_payload(decode=True)
+    if not payload:
+        return ""
+    charset = part.get_content_charset() or "utf-8"
+    try:
+        return payload.decode(charset, errors="replace")
+    except LookupError:
+        # Unknown charset name in the message headers
+        return payload.decode("utf-8", errors="replace")
+
 
 class SMPTEmailIntegration(EmailIntegration, Integration):
     """SMTP-based email integration for sending and receiving emails.
@@ -26,6 +57,10 @@ class SMPTEmailIntegration(EmailIntegration, Integration):
         imap_port (int): IMAP server port
         email (str): Email address used for authentication
         _password (str): Password used for authentication
+
+    The authenticated SMTP and IMAP sessions are kept open between calls and
+    reused while the server still answers NOOP, so back-to-back calls do not
+    each pay for a TLS handshake and login.
     """
 
     def __init__(self, integration_config: IntegrationConfig):
@@ -36,6 +71,71 @@ class SMPTEmailIntegration(EmailIntegration, Integration):
         self.imap_port = integration_config.attributes.get("IMAP Port")
         self.email = integration_config.attributes.get("email")
         self._password = integration_config.attributes.get("password")
+        self._smtp: Optional[smtplib.SMTP_SSL] = None
+        self._smtp_lock = threading.Lock()
+        self._imap: Optional[imaplib.IMAP4_SSL] = None
+        self._imap_lock = threading.Lock()
+
+    def _get_smtp(self) -> smtplib.SMTP_SSL:
+        """Return a logged-in SMTP session, reconnecting if the cached one is gone.
+
+        Must be called with ``_smtp_lock`` held.
+        """
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except Exception:
+                pass
+            self._drop_smtp()
+
+        server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port)
+        server.login(self.email, self._password)
+        self._smtp = server
+        return server
+
+    def _drop_smtp(self) -> None:
+        """Close and forget the cached SMTP session."""
+        server, self._smtp = self._smtp, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+    def _get_imap(self) -> imaplib.IMAP4_SSL:
+        """Return a logged-in IMAP session, reconnecting if the cached one is gone.
+
+        Must be called with ``_imap_lock`` held.
+        """
+        if self._imap is not None:
+            try:
+                if self._imap.noop()[0] == "OK":
+                    return self._imap
+            except Exception:
+                pass
+            self._drop_imap()
+
+        imap_conn = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
+        imap_conn.login(self.email, self._password)
+        self._imap = imap_conn
+        return imap_conn
+
+    def _drop_imap(self) -> None:
+        """Log out of and forget the cached IMAP session."""
+        imap_conn, self._imap = self._imap, None
+        if imap_conn is not None:
+            try:
+                imap_conn.logout()
+            except Exception as e:
+                print(f"Error during logout: {e}")
+
+    def close(self) -> None:
+        """Close the cached SMTP and IMAP sessions."""
+        with self._smtp_lock:
+            self._drop_smtp()
+        with self._imap_lock:
+            self._drop_imap()
 
     def send_email(
         self,
@@ -72,19 +172,20 @@ class SMPTEmailIntegration(EmailIntegration, Integration):
             if files:
                 for file in files:
                     part = MIMEBase("application", "octet-stream")
-                    with open(file, "rb") as f:
-                        part.set_payload(f.read())
-                    encoders.encode_base64(part)
+                    part.set_payload(_encode_attachment(file))
+                    part["Content-Transfer-Encoding"] = "base64"
                     part.add_header(
                         "Content-Disposition",
                         f"attachment; filename={file.split('/')[-1]}",
                     )
                     msg.attach(part)
 
-            server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port)
-            server.login(self.email, self._password)
-            server.send_message(msg)
-            server.quit()
+            with self._smtp_lock:
+                try:
+                    self._get_smtp().send_message(msg)
+                except Exception:
+                    self._drop_smtp()
+                    raise
 
             content_snippet = (html_body or body)[:50]
             return f"Email sent successfully from {self.email} to {to}. Message content preview: '{content_snippet}'"
@@ -103,19 +204,28 @@ class SMPTEmailIntegration(EmailIntegration, Integration):
                                           (From, Subject, Body) if successful,
                                           None if an error occurred
         """
-        imap_conn = None
+        self._imap_lock.acquire()
         try:
-            imap_conn = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
-            imap_conn.login(self.email, self._password)
+            imap_conn = self._get_imap()
             imap_conn.select("inbox")
 
             _, message_numbers = imap_conn.search(None, "ALL")
             start_index = max(0, len(message_numbers[0].split()) - num)
             emails_list = []
 
-            for num in message_numbers[0].split()[start_index:]:
-                _, data = imap_conn.fetch(num, "(RFC822)")
-                msg = email.message_from_bytes(data[0][1])
+            # Fetch every requested message in a single round trip;
+            # BODY.PEEK[] does not set the \Seen flag
+            wanted = message_numbers[0].split()[start_index:]
+            if not wanted:
+                return emails_list
+            _, data = imap_conn.fetch(b",".join(wanted).decode(), "(BODY.PEEK[])")
+
+            for item in data:
+                # Each message arrives as an (envelope, literal) tuple; the
+                # bare b")" entries between them close the FETCH responses
+                if not isinstance(item, tuple):
+                    continue
+                msg = email.message_from_bytes(item[1])
 
                 email_data = {
                     "From": msg["From"],
@@ -129,15 +239,10 @@ class SMPTEmailIntegration(EmailIntegration, Integration):
                             part.get_content_type() == "text/plain"
                             and "attachment" not in str(part.get("Content-Disposition"))
                         ):
-                            email_data["Body"] = part.get_payload(
-                                decode=True).decode()
+                            email_data["Body"] = _decode_body(part)
                             break
                 else:
-                    email_data["Body"] = (
-                        msg.get_payload(decode=True).decode()
-                        if msg.get_payload()
-                        else ""
-                    )
+                    email_data["Body"] = _decode_body(msg)
 
                 emails_list.append(email_data)
 
@@ -145,10 +250,7 @@ class SMPTEmailIntegration(EmailIntegration, Integration):
 
         except Exception as e:
             print(f"An error occurred: {e}")
+            self._drop_imap()
             return None
         finally:
-            if imap_conn:
-                try:
-                    imap_conn.logout()
-                except Exception as e:
-                    print(f"Error during logout: {e}")
+            self._imap_lock.release()
@@ -101,6 +101,24 @@ def to_async(func: Callable) -> Callable:
     return wrapper
 
 
+def install_uvloop() -> bool:
+    """
+    Use uvloop for event loops created from now on (e.g. by asyncio.run).
+    
+    uvloop is an optional dependency and isn't available on Windows, in
+    which case the default asyncio loop is kept.
+    
+    Returns:
+        True if uvloop was installed, False otherwise
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
 class AsyncContextManager:
     """Base class for async context managers."""
     
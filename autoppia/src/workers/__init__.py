@@ -7,7 +7,9 @@ autonomous AI agents with support for various integrations and deployment option
 Quick Start:
     from autoppia.src.workers import AIWorker, WorkerConfig, WorkerAPI, run_worker_server
     
-    # Simple way - use utility functions
+    # Simple way - use utility functions (optionally call
+    # autoppia.src.utils.async_utils.install_uvloop() before asyncio.run
+    # for a faster event loop)
     await run_worker_server(
         worker_id=123,
         worker_class=MyWorker,
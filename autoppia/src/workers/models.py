@@ -6,10 +6,37 @@ WebSocket communication between workers and clients.
 """
 
 import json
+import sys
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is a declared dependency
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def encode_json(obj: Any) -> str:
+    """Serialize ``obj`` to a JSON string, using orjson when available
+
+    numpy values are serialized natively by orjson; any other unsupported
+    object falls back to ``str()`` instead of failing the send.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=_ORJSON_OPTIONS).decode()
+    return json.dumps(obj, default=str)
+
+
+def decode_json(payload: Union[str, bytes]) -> Any:
+    """Parse a JSON ``str`` or ``bytes`` payload, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
 
 
 class MessageType(Enum):
@@ -23,21 +50,32 @@ class MessageType(Enum):
     HEARTBEAT = "heartbeat"
 
 
-@dataclass
+# Start of every serialized STREAM message. WebSocketMessage.to_json() and
+# WorkerAPI's stream frames write "type" first with compact separators; the
+# second form is what the stdlib json fallback produces. WorkerRouter matches
+# raw frames against these to skip decoding streams nobody listens to.
+STREAM_FRAME_PREFIX = '{"type":"stream"'
+STREAM_FRAME_PREFIXES = (STREAM_FRAME_PREFIX, '{"type": "stream"')
+
+
+# dataclass(slots=True) needs Python 3.10+; older interpreters keep a __dict__
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Wire value -> MessageType, avoiding Enum value lookup on every decoded frame
+_TYPE_LOOKUP = {member.value: member for member in MessageType}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class WebSocketMessage:
     """Structured message format for WebSocket communication"""
     type: MessageType
     id: str
     data: Any
-    timestamp: float = None
-    
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = time.time()
+    timestamp: float = field(default_factory=time.time)
     
     def to_json(self) -> str:
         """Convert message to JSON string"""
-        return json.dumps({
+        return encode_json({
             "type": self.type.value,
             "id": self.id,
             "data": self.data,
@@ -45,11 +83,15 @@ class WebSocketMessage:
         })
     
     @classmethod
-    def from_json(cls, json_str: str) -> 'WebSocketMessage':
+    def from_json(cls, json_str: Union[str, bytes]) -> 'WebSocketMessage':
         """Create message from JSON string"""
-        data = json.loads(json_str)
+        return cls.from_dict(decode_json(json_str))
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'WebSocketMessage':
+        """Create message from an already decoded JSON object"""
         return cls(
-            type=MessageType(data["type"]),
+            type=_TYPE_LOOKUP[data["type"]],
             id=data["id"],
             data=data["data"],
             timestamp=data.get("timestamp", time.time())
@@ -2,22 +2,43 @@ import asyncio
 import websockets
 import json
 import logging
+import random
 import time
-import uuid
+from secrets import token_hex
 from typing import Optional, Callable, Dict, Any
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 import threading
 
-from .models import MessageType, WebSocketMessage
+from .models import STREAM_FRAME_PREFIXES, MessageType, WebSocketMessage
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("WorkerRouter")
 
 
+class WorkerError(Exception):
+    """The worker handled the request and reported an error; not retried"""
+
+
 class ConnectionState:
     """Track connection state and response handling"""
     
+    __slots__ = (
+        "connected",
+        "processing",
+        "result",
+        "error",
+        "completed",
+        "last_activity",
+        "message_count",
+        "stream_callback",
+        "connection_id",
+        "pending_callback",
+        "stream_buffer",
+        "flush_handle",
+        "completion_event",
+    )
+    
     def __init__(self):
         self.connected = False
         self.processing = False
@@ -28,6 +49,11 @@ class ConnectionState:
         self.message_count = 0
         self.stream_callback = None
         self.connection_id = None
+        self.pending_callback = None
+        self.stream_buffer = []
+        self.flush_handle = None
+        # Created on the router's event loop at the start of each request
+        self.completion_event = None
     
     def reset_for_new_request(self):
         """Reset state for a new request"""
@@ -36,11 +62,19 @@ class ConnectionState:
         self.error = None
         self.completed = False
         self.message_count = 0
+        self.pending_callback = None
+        self.stream_buffer = []
+        self.flush_handle = None
         self.update_activity()
     
     def update_activity(self):
         """Update last activity timestamp"""
         self.last_activity = time.time()
+    
+    def signal_completion(self):
+        """Wake up the request waiting in _wait_for_response"""
+        if self.completion_event is not None:
+            self.completion_event.set()
 
 
 class WorkerRouter:
@@ -63,18 +97,49 @@ class WorkerRouter:
         Args:
             ip: IP address of the worker server
             port: Port number of the worker server
+            api_key: Optional API key sent as the ``x-api-key`` header
+            bearer_token: Optional JWT sent as an ``Authorization: Bearer`` header
         """
         self.ip = ip
         self.port = port
         self.url = f"ws://{ip}:{port}"
         self.state = ConnectionState()
         self.websocket = None
-        self.executor = ThreadPoolExecutor(max_workers=4)
         self.event_loop = None
         self.loop_thread = None
+        # Stream callbacks run here so slow user code never stalls the receive
+        # loop; a single thread keeps chunks in arrival order. Created with the
+        # event loop, so a router can be used again after close().
+        self._callback_executor: Optional[ThreadPoolExecutor] = None
         self._lock = threading.Lock()
         self.api_key = api_key
         self.bearer_token = bearer_token
+
+        # Connection options are built once; credentials are fixed for the
+        # lifetime of the router, so mutating api_key/bearer_token after
+        # construction is not supported.
+        self._headers = {}
+        if api_key:
+            self._headers["x-api-key"] = api_key
+        if bearer_token:
+            self._headers["Authorization"] = f"Bearer {bearer_token}"
+        self._connect_kwargs = {
+            "ping_interval": 20,
+            "ping_timeout": 60,
+            "close_timeout": 10,
+            "max_size": 50 * 1024 * 1024,
+        }
+        if self._headers:
+            self._connect_kwargs["extra_headers"] = self._headers
+
+        # Incoming message dispatch table, keyed by message type
+        self._handlers = {
+            MessageType.CONNECT: self._on_connect,
+            MessageType.STREAM: self._on_stream,
+            MessageType.COMPLETE: self._on_complete,
+            MessageType.ERROR: self._on_error,
+            MessageType.HEARTBEAT: self._on_ignored,
+        }
         
         # Configuration
         self.connect_timeout = 30  # seconds
@@ -82,18 +147,29 @@ class WorkerRouter:
         self.heartbeat_interval = 30  # seconds
         self.max_retries = 3
         self.retry_delay = 5  # seconds
-        
-        logger.info(f"WorkerRouter initialized for {self.url}")
-        logger.info(f"Timeouts: connect={self.connect_timeout}s, response={self.response_timeout}s")
-        logger.info(f"Retries: max={self.max_retries}, delay={self.retry_delay}s")
+        # Streamed chunks are coalesced for up to this long (or this many
+        # chunks) before the stream callback fires; 0 delivers every chunk.
+        self.stream_batch_window = 0.02  # seconds
+        self.stream_batch_size = 32
+        
+        logger.info("WorkerRouter initialized for %s", self.url)
+        logger.info("Timeouts: connect=%ss, response=%ss", self.connect_timeout, self.response_timeout)
+        logger.info("Retries: max=%s, delay=%ss", self.max_retries, self.retry_delay)
     
-    def call(self, message: str, stream_callback: Optional[Callable[[str], None]] = None) -> str:
+    def call(
+        self,
+        message: str,
+        stream_callback: Optional[Callable[[str], None]] = None,
+        keep_alive: bool = False,
+    ) -> str:
         """
         Send a message to the worker and wait for response.
         
         Args:
             message: The message to send
             stream_callback: Optional callback for streaming responses
+            keep_alive: Keep the WebSocket open after the call so the next
+                call reuses it instead of reconnecting; released by close()
         
         Returns:
             The worker's response
@@ -108,33 +184,130 @@ class WorkerRouter:
             self.state.processing = True
         
         try:
-            return self._call_with_retry(message, stream_callback)
+            return self._call_with_retry(message, stream_callback, keep_alive)
         finally:
             with self._lock:
                 self.state.processing = False
     
-    def _call_with_retry(self, message: str, stream_callback: Optional[Callable[[str], None]]) -> str:
+    def _call_with_retry(
+        self, message: str, stream_callback: Optional[Callable[[str], None]], keep_alive: bool
+    ) -> str:
         """Execute call with retry logic"""
         last_exception = None
         
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"Attempt {attempt + 1}/{self.max_retries} to process message")
-                return self._execute_call(message, stream_callback)
+                logger.info("Attempt %d/%d to process message", attempt + 1, self.max_retries)
+                return self._execute_call(message, stream_callback, keep_alive)
                     
+            except WorkerError:
+                raise
             except Exception as e:
                 last_exception = e
-                logger.error(f"Attempt {attempt + 1} failed: {e}")
+                delay = self._attempt_failed(attempt, e)
+                if delay is not None:
+                    time.sleep(delay)
+        
+        raise self._retries_exhausted(last_exception)
+    
+    async def acall(
+        self,
+        message: str,
+        stream_callback: Optional[Callable[[str], None]] = None,
+        keep_alive: bool = False,
+    ) -> str:
+        """
+        Async counterpart of call() for callers already inside an event loop.
+        
+        The request still runs on the router's background loop; awaiting it
+        only suspends the calling coroutine instead of blocking its loop the
+        way call() would.
+        
+        Args:
+            message: The message to send
+            stream_callback: Optional callback for streaming responses
+            keep_alive: Keep the WebSocket open for the next call
+        
+        Returns:
+            The worker's response
+            
+        Raises:
+            Exception: If the call fails after all retries
+        """
+        with self._lock:
+            if self.state.processing:
+                raise Exception("Another call is already in progress")
+            
+            self.state.processing = True
+        
+        try:
+            last_exception = None
+            
+            for attempt in range(self.max_retries):
+                try:
+                    logger.info("Attempt %d/%d to process message", attempt + 1, self.max_retries)
+                    # Starting the background loop waits for its thread, so
+                    # do it off the caller's loop
+                    if self.event_loop is None or not self.event_loop.is_running():
+                        await asyncio.get_running_loop().run_in_executor(None, self._ensure_event_loop)
+                    return await asyncio.wait_for(
+                        asyncio.wrap_future(self._submit_call(message, stream_callback, keep_alive)),
+                        timeout=self._attempt_timeout(),
+                    )
                 
-                if attempt < self.max_retries - 1:
-                    logger.info(f"Retrying in {self.retry_delay} seconds...")
-                time.sleep(self.retry_delay)
-                self._cleanup_connection()
+                except WorkerError:
+                    raise
+                except Exception as e:
+                    last_exception = e
+                    delay = self._attempt_failed(attempt, e)
+                    if delay is not None:
+                        await asyncio.sleep(delay)
+            
+            raise self._retries_exhausted(last_exception)
+        finally:
+            with self._lock:
+                self.state.processing = False
+    
+    def _attempt_failed(self, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Handle a failed (0-based) attempt for call() and acall().
+        
+        Drops the connection and returns how long to wait before the next
+        attempt, or None when no attempts are left.
+        """
+        logger.error("Attempt %d failed: %s", attempt + 1, error)
+        self._cleanup_connection()
         
-        raise Exception(f"All {self.max_retries} attempts failed. Last error: {last_exception}")
+        if attempt >= self.max_retries - 1:
+            return None
+        delay = self._backoff_delay(attempt)
+        logger.info("Retrying in %.2f seconds...", delay)
+        return delay
     
-    def _execute_call(self, message: str, stream_callback: Optional[Callable[[str], None]]) -> str:
-        """Execute a single call attempt"""
+    def _retries_exhausted(self, last_exception: Optional[Exception]) -> Exception:
+        """Build the error raised once every attempt has failed"""
+        return Exception(f"All {self.max_retries} attempts failed. Last error: {last_exception}")
+    
+    def _attempt_timeout(self) -> float:
+        """Upper bound on a single attempt, on top of the async response timeout"""
+        return self.response_timeout + 60
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """
+        Delay before retrying after the given (0-based) failed attempt.
+        
+        The first retry goes out at once; later ones use exponential backoff
+        with full jitter, capped at retry_delay, so clients that failed
+        together don't reconnect in lockstep.
+        """
+        if attempt == 0:
+            return 0.0
+        return random.uniform(0, min(self.retry_delay, 2 ** attempt))
+    
+    def _submit_call(
+        self, message: str, stream_callback: Optional[Callable[[str], None]], keep_alive: bool
+    ) -> Future:
+        """Schedule a single call attempt on the background event loop"""
         # Start event loop in background thread if not running
         self._ensure_event_loop()
         
@@ -142,16 +315,23 @@ class WorkerRouter:
         self.state.reset_for_new_request()
         self.state.stream_callback = stream_callback
         
-        # Execute the async call
-        future = asyncio.run_coroutine_threadsafe(
-            self._async_call(message),
+        return asyncio.run_coroutine_threadsafe(
+            self._async_call(message, keep_alive),
             self.event_loop
         )
-        
-        return future.result(timeout=self.response_timeout + 60)  # Add buffer to async timeout
+    
+    def _execute_call(
+        self, message: str, stream_callback: Optional[Callable[[str], None]], keep_alive: bool
+    ) -> str:
+        """Execute a single call attempt"""
+        future = self._submit_call(message, stream_callback, keep_alive)
+        return future.result(timeout=self._attempt_timeout())
     
     def _ensure_event_loop(self):
         """Ensure event loop is running in background thread"""
+        if self._callback_executor is None:
+            self._callback_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="WorkerRouter-callback")
+        
         if self.event_loop is None or not self.event_loop.is_running():
             if self.loop_thread and self.loop_thread.is_alive():
                 self.loop_thread.join(timeout=5)
@@ -173,12 +353,13 @@ class WorkerRouter:
         try:
             self.event_loop.run_forever()
         except Exception as e:
-            logger.error(f"Event loop error: {e}")
+            logger.error("Event loop error: %s", e)
         finally:
             self.event_loop = None
     
-    async def _async_call(self, message: str) -> str:
+    async def _async_call(self, message: str, keep_alive: bool = False) -> str:
         """Async implementation of the call"""
+        self.state.completion_event = asyncio.Event()
         try:
             # Connect to server
             await self._connect()
@@ -190,37 +371,26 @@ class WorkerRouter:
             return await self._wait_for_response()
             
         except Exception as e:
-            logger.error(f"Async call failed: {e}")
+            logger.error("Async call failed: %s", e)
+            # Never reuse a connection that may be in an unknown state
+            await self._disconnect()
             raise
         finally:
-            await self._disconnect()
+            if not keep_alive:
+                await self._disconnect()
     
     async def _connect(self):
         """Connect to the WebSocket server"""
         if self.websocket and not self.websocket.closed:
             return
         
-        logger.info(f"Connecting to {self.url}...")
+        logger.info("Connecting to %s...", self.url)
         
         try:
-            connect_kwargs = {
-                "ping_interval": 20,
-                "ping_timeout": 60,
-                "close_timeout": 10,
-                "max_size": 50 * 1024 * 1024,
-            }
-            headers = {}
-            if self.api_key:
-                headers["x-api-key"] = self.api_key
-            if self.bearer_token:
-                headers["Authorization"] = f"Bearer {self.bearer_token}"
-            if headers:
-                connect_kwargs["extra_headers"] = headers
-
             self.websocket = await asyncio.wait_for(
                 websockets.connect(
                     self.url,
-                    **connect_kwargs
+                    **self._connect_kwargs
                 ),
                 timeout=self.connect_timeout
             )
@@ -244,7 +414,7 @@ class WorkerRouter:
                 await self.websocket.close()
                 logger.info("Disconnected from server")
             except Exception as e:
-                logger.error(f"Error during disconnect: {e}")
+                logger.error("Error during disconnect: %s", e)
         
         self.state.connected = False
         self.websocket = None
@@ -256,101 +426,185 @@ class WorkerRouter:
         
         message = WebSocketMessage(
             type=MessageType.MESSAGE,
-            id=str(uuid.uuid4()),
+            # Opaque correlation id; the worker only echoes it back, so a
+            # 64-bit random token is enough and much cheaper than a UUID.
+            id=token_hex(8),
             data={"content": content}
         )
         
         await self.websocket.send(message.to_json())
-        logger.info(f"Message sent: {content[:50]}...")
+        logger.info("Message sent: %.50s...", content)
     
     async def _handle_messages(self):
         """Handle incoming messages from server"""
+        state = self.state
         try:
             async for raw_message in self.websocket:
+                # Without a stream callback, stream frames only count as
+                # activity, so skip decoding them
+                if (
+                    state.stream_callback is None
+                    and isinstance(raw_message, str)
+                    and raw_message.startswith(STREAM_FRAME_PREFIXES)
+                ):
+                    state.update_activity()
+                    state.message_count += 1
+                    continue
                 try:
                     message = WebSocketMessage.from_json(raw_message)
                     await self._process_message(message)
                 except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON received: {e}")
+                    logger.error("Invalid JSON received: %s", e)
                 except Exception as e:
-                    logger.error(f"Error processing message: {e}")
+                    logger.error("Error processing message: %s", e)
         
         except websockets.exceptions.ConnectionClosed:
             logger.info("Connection closed by server")
             self.state.connected = False
         except Exception as e:
-            logger.error(f"Error in message handler: {e}")
+            logger.error("Error in message handler: %s", e)
             self.state.connected = False
+        # Deliver whatever was streamed before the drop, then wake any pending
+        # wait so it notices the lost connection at once
+        try:
+            self._flush_stream()
+        finally:
+            self.state.signal_completion()
     
     async def _process_message(self, message: WebSocketMessage):
         """Process incoming message based on type"""
-        self.state.update_activity()
-        self.state.message_count += 1
-        
-        logger.debug(f"Received {message.type.value} (#{self.state.message_count})")
-        
-        if message.type == MessageType.CONNECT:
-            logger.info("Connection confirmed by server")
-            self.state.connection_id = message.id
-        
-        elif message.type == MessageType.STREAM:
-            content = message.data.get("content", "")
-            if self.state.stream_callback and content:
-                try:
-                    self.state.stream_callback(content)
-                except Exception as e:
-                    logger.error(f"Stream callback error: {e}")
+        state = self.state
+        state.update_activity()
+        state.message_count += 1
         
-        elif message.type == MessageType.COMPLETE:
-            self.state.result = message.data.get("result", "")
-            self.state.error = message.data.get("error")
-            self.state.completed = True
-            logger.info(f"Request completed (processed {self.state.message_count} messages)")
+        logger.debug("Received %s (#%d)", message.type.value, state.message_count)
         
-        elif message.type == MessageType.ERROR:
-            self.state.error = message.data.get("error", "Unknown error")
-            self.state.completed = True
-            logger.error(f"Server error: {self.state.error}")
-        
-        elif message.type == MessageType.HEARTBEAT:
-            # Echo heartbeat if needed
-            pass
+        self._handlers.get(message.type, self._on_ignored)(message)
+    
+    def _on_connect(self, message: WebSocketMessage):
+        """Handle the server's connection confirmation"""
+        logger.info("Connection confirmed by server")
+        self.state.connection_id = message.id
+    
+    def _on_stream(self, message: WebSocketMessage):
+        """Forward streamed content to the stream callback"""
+        callback = self.state.stream_callback
+        if callback is None:
+            return
+        content = message.data.get("content", "")
+        if not content:
+            return
+        state = self.state
+        buffer = state.stream_buffer
+        buffer.append(content)
+        if len(buffer) >= self.stream_batch_size or self.stream_batch_window <= 0:
+            self._flush_stream()
+        elif state.flush_handle is None:
+            state.flush_handle = asyncio.get_running_loop().call_later(
+                self.stream_batch_window, self._flush_stream
+            )
+    
+    def _flush_stream(self):
+        """Deliver buffered stream chunks to the callback as a single string"""
+        state = self.state
+        if state.flush_handle is not None:
+            state.flush_handle.cancel()
+            state.flush_handle = None
+        executor = self._callback_executor
+        if not state.stream_buffer or state.stream_callback is None or executor is None:
+            return
+        content = "".join(state.stream_buffer)
+        state.stream_buffer = []
+        state.pending_callback = asyncio.get_running_loop().run_in_executor(
+            executor, self._run_stream_callback, state.stream_callback, content
+        )
+    
+    @staticmethod
+    def _run_stream_callback(callback: Callable[[str], None], content: str):
+        """Invoke the user's stream callback, logging any error it raises"""
+        try:
+            callback(content)
+        except Exception as e:
+            logger.error("Stream callback error: %s", e)
+    
+    def _on_complete(self, message: WebSocketMessage):
+        """Record the final result of the request"""
+        state = self.state
+        state.result = message.data.get("result", "")
+        state.error = message.data.get("error")
+        # The waiter must wake up even if handing off the last chunks fails
+        try:
+            self._flush_stream()
+        finally:
+            state.completed = True
+            state.signal_completion()
+        logger.info("Request completed (processed %d messages)", state.message_count)
+    
+    def _on_error(self, message: WebSocketMessage):
+        """Record a server-side error for the request"""
+        state = self.state
+        state.error = message.data.get("error", "Unknown error")
+        try:
+            self._flush_stream()
+        finally:
+            state.completed = True
+            state.signal_completion()
+        logger.error("Server error: %s", state.error)
+    
+    def _on_ignored(self, message: WebSocketMessage):
+        """Ignore messages that need no client-side handling (e.g. heartbeats)"""
     
     async def _wait_for_response(self) -> str:
         """Wait for response with timeout"""
-        start_time = time.time()
-        
-        logger.info(f"Waiting for response (timeout: {self.response_timeout}s)")
-        
-        while not self.state.completed:
-            current_time = time.time()
-            elapsed = current_time - start_time
-            
+        # Bind loop invariants to locals; the loop only wakes on completion,
+        # connection loss or when one of the timeouts may have expired.
+        state = self.state
+        ws = self.websocket
+        response_timeout = self.response_timeout
+        activity_timeout = min(300, response_timeout / 2)  # 5 minutes or half response timeout
+        completion_event = state.completion_event
+        now = time.time
+        start_time = now()
+
+        logger.info("Waiting for response (timeout: %ss)", response_timeout)
+
+        while not state.completed:
+            current_time = now()
+
             # Check connection
-            if not self.state.connected or (self.websocket and self.websocket.closed):
+            if not state.connected or (ws is not None and ws.closed):
                 raise Exception("Connection lost during response wait")
-            
+
             # Check timeout
-            if elapsed > self.response_timeout:
-                raise Exception(f"Response timeout after {self.response_timeout} seconds")
-            
+            response_remaining = response_timeout - (current_time - start_time)
+            if response_remaining <= 0:
+                raise Exception(f"Response timeout after {response_timeout} seconds")
+
             # Check activity timeout (no messages received)
-            since_activity = current_time - self.state.last_activity
-            activity_timeout = min(300, self.response_timeout / 2)  # 5 minutes or half response timeout
-            
-            if since_activity > activity_timeout:
+            activity_remaining = activity_timeout - (current_time - state.last_activity)
+            if activity_remaining <= 0:
                 raise Exception(f"No activity timeout after {activity_timeout} seconds")
-            
-            await asyncio.sleep(0.5)
-        
-        total_time = time.time() - start_time
-        logger.info(f"Response received after {total_time:.1f}s")
-        
+
+            try:
+                await asyncio.wait_for(
+                    completion_event.wait(),
+                    timeout=min(response_remaining, activity_remaining)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+        # Let queued stream callbacks finish before handing back the result
+        if state.pending_callback is not None:
+            await state.pending_callback
+
+        total_time = now() - start_time
+        logger.info("Response received after %.1fs", total_time)
+
         # Handle errors
-        if self.state.error:
-            raise Exception(f"Worker error: {self.state.error}")
-        
-        return self.state.result or ""
+        if state.error:
+            raise WorkerError(f"Worker error: {state.error}")
+
+        return state.result or ""
     
     def _cleanup_connection(self):
         """Clean up connection state"""
@@ -367,15 +621,28 @@ class WorkerRouter:
         """Close the router and clean up resources"""
         logger.info("Closing WorkerRouter...")
         
-        self._cleanup_connection()
+        if self.event_loop and self.event_loop.is_running():
+            # Wait for a kept-alive socket to close before the loop is stopped
+            try:
+                asyncio.run_coroutine_threadsafe(
+                    self._disconnect(),
+                    self.event_loop
+                ).result(timeout=15)
+            except Exception as e:
+                logger.error("Error during disconnect: %s", e)
+        
+        self.state.connected = False
+        self.state.completed = False
         
         if self.event_loop and self.event_loop.is_running():
             self.event_loop.call_soon_threadsafe(self.event_loop.stop)
         
         if self.loop_thread and self.loop_thread.is_alive():
             self.loop_thread.join(timeout=5)
-        
-        self.executor.shutdown(wait=True)
+
+        if self._callback_executor is not None:
+            self._callback_executor.shutdown(wait=True)
+            self._callback_executor = None
         logger.info("WorkerRouter closed")
     
     def get_status(self) -> Dict[str, Any]:
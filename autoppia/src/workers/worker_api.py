@@ -1,14 +1,18 @@
 import asyncio
+import inspect
 import websockets
 import json
 import logging
+import threading
 import time
 import uuid
-from typing import Optional, Dict, Any, Callable
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Tuple
 from concurrent.futures import ThreadPoolExecutor
 
-from .models import MessageType, WebSocketMessage
+from .models import STREAM_FRAME_PREFIX, MessageType, WebSocketMessage, decode_json, encode_json
 from ..utils.api_key import ApiKeyVerifier
+from ..utils.async_utils import install_uvloop
 from ..utils.jwt_verifier import JWTVerifier
 from urllib.parse import urlparse, parse_qs
 
@@ -16,6 +20,81 @@ from urllib.parse import urlparse, parse_qs
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("WorkerAPI")
 
+# Queued after the last streamed chunk to signal that the worker has returned
+_STREAM_END = object()
+
+# Upper bound on the text coalesced into a single STREAM frame
+_STREAM_COALESCE_CHARS = 16 * 1024
+
+# Chunks a streaming worker may get ahead of the client before its stream
+# callback blocks
+_STREAM_QUEUE_CHUNKS = 256
+
+# Fixed skeleton of a serialized STREAM WebSocketMessage, split around the
+# content; the head only depends on the stream id, so it is built once per
+# stream and each chunk just adds its content and timestamp
+_STREAM_FRAME_HEAD = STREAM_FRAME_PREFIX + ',"id":%s,"data":{"content":'
+_STREAM_FRAME_TAIL = '},"timestamp":%r}'
+
+# Serialized welcome frame; only the client's connection id and the
+# timestamp vary
+_WELCOME_FRAME = (
+    '{"type":"connect","id":%s,'
+    '"data":{"message":"Connection established. Ready to process requests."},'
+    '"timestamp":%r}'
+)
+
+# Serialized HEARTBEAT reply; only the echoed id and the timestamps vary
+_HEARTBEAT_FRAME = '{"type":"heartbeat","id":%s,"data":{"status":"alive","timestamp":%r},"timestamp":%r}'
+
+
+def _drain_chunks(queue: asyncio.Queue, first: str):
+    """
+    Join ``first`` with chunks already waiting in ``queue`` into one frame.
+
+    Only chunks that are queued right now are taken; callers decide how long
+    to let the queue fill (see WorkerAPI.stream_flush_interval).
+
+    Returns:
+        Tuple of the joined text, the number of chunks taken from ``queue``
+        and whether the end-of-stream marker was hit
+    """
+    parts = [first]
+    size = len(first)
+    while size < _STREAM_COALESCE_CHARS and not queue.empty():
+        chunk = queue.get_nowait()
+        if chunk is _STREAM_END:
+            return "".join(parts), len(parts) - 1, True
+        parts.append(chunk)
+        size += len(chunk)
+    return "".join(parts), len(parts) - 1, False
+
+
+def _format_dict_chunk(chunk: dict) -> str:
+    """Render a structured worker chunk (text or tool event) as text"""
+    chunk_type = chunk.get("type")
+    if chunk_type == "text":
+        return chunk.get("text", "")
+    if chunk_type == "task":
+        return f"[TOOL] {chunk.get('title', '')}: {chunk.get('text', '')}"
+    return str(chunk)
+
+
+# Exact-type dispatch for the chunk shapes workers emit; anything else goes
+# through the slower isinstance fallback in _format_chunk.
+_CHUNK_FORMATTERS: Dict[type, Callable[[Any], str]] = {
+    str: str,
+    dict: _format_dict_chunk,
+}
+
+
+def _format_chunk(chunk: Any) -> str:
+    """Convert a chunk passed to a worker's stream callback into text"""
+    formatter = _CHUNK_FORMATTERS.get(type(chunk))
+    if formatter is None:
+        formatter = _format_dict_chunk if isinstance(chunk, dict) else str
+    return formatter(chunk)
+
 
 class ClientConnection:
     """Represents a connected client with state management"""
@@ -27,17 +106,33 @@ class ClientConnection:
         self.last_activity = time.time()
         self.is_processing = False
         self.message_count = 0
+        # Outgoing message ids are "<client prefix>-<sequence>"; unique per
+        # connection without a urandom call and UUID formatting per message
+        self._id_prefix = client_id[:8]
+        self._id_seq = 0
+        # Stream id and serialized frame head of the stream being sent
+        self._stream_id = None
+        self._stream_head = None
         
     def update_activity(self):
         """Update last activity timestamp"""
         self.last_activity = time.time()
     
+    def next_id(self) -> str:
+        """Return a new id for an outgoing message"""
+        self._id_seq += 1
+        return f"{self._id_prefix}-{self._id_seq}"
+    
     async def send_message(self, message: WebSocketMessage):
         """Send message to client with error handling"""
+        await self._send_text(message.to_json(), message.type)
+    
+    async def _send_text(self, payload: str, message_type: MessageType):
+        """Send an already serialized message to client with error handling"""
         try:
-            await self.websocket.send(message.to_json())
+            await self.websocket.send(payload)
             self.message_count += 1
-            logger.debug(f"Sent message to {self.client_id}: {message.type.value}")
+            logger.debug("Sent message to %s: %s", self.client_id, message_type.value)
         except websockets.exceptions.ConnectionClosed:
             logger.warning(f"Client {self.client_id} connection closed while sending message")
             raise
@@ -47,27 +142,37 @@ class ClientConnection:
     
     async def send_stream(self, content: str, stream_id: str = None):
         """Send streaming content to client"""
-        message = WebSocketMessage(
-            type=MessageType.STREAM,
-            id=stream_id or str(uuid.uuid4()),
-            data={"content": content}
-        )
-        await self.send_message(message)
+        # Same wire format as WebSocketMessage.to_json(), without building
+        # and encoding the whole message for every chunk
+        if stream_id is None or stream_id != self._stream_id:
+            self._stream_id = stream_id
+            self._stream_head = _STREAM_FRAME_HEAD % encode_json(stream_id or self.next_id())
+        payload = self._stream_head + encode_json(content) + _STREAM_FRAME_TAIL % time.time()
+        await self._send_text(payload, MessageType.STREAM)
     
     async def send_complete(self, result: str, error: str = None):
         """Send completion message to client"""
         message = WebSocketMessage(
             type=MessageType.COMPLETE,
-            id=str(uuid.uuid4()),
+            id=self.next_id(),
             data={"result": result, "error": error}
         )
         await self.send_message(message)
     
+    async def send_welcome(self):
+        """Send the connection confirmation to client"""
+        await self._send_text(_WELCOME_FRAME % (encode_json(self.client_id), time.time()), MessageType.CONNECT)
+    
+    async def send_heartbeat(self, message_id: str):
+        """Answer a client heartbeat"""
+        now = time.time()
+        await self._send_text(_HEARTBEAT_FRAME % (encode_json(message_id), now, now), MessageType.HEARTBEAT)
+    
     async def send_error(self, error: str):
         """Send error message to client"""
         message = WebSocketMessage(
             type=MessageType.ERROR,
-            id=str(uuid.uuid4()),
+            id=self.next_id(),
             data={"error": error}
         )
         await self.send_message(message)
@@ -86,7 +191,14 @@ class WorkerAPI:
     - Simple API for easy integration
     """
     
-    def __init__(self, worker, host: str = "localhost", port: int = 8000, api_base_url: Optional[str] = "https://api.autoppia.com"):
+    def __init__(
+        self,
+        worker,
+        host: str = "localhost",
+        port: int = 8000,
+        api_base_url: Optional[str] = "https://api.autoppia.com",
+        worker_concurrency: int = 10,
+    ):
         """
         Initialize the WorkerAPI.
         
@@ -94,20 +206,49 @@ class WorkerAPI:
             worker: Worker instance that processes messages
             host: Host to bind the server to
             port: Port to listen on
+            worker_concurrency: Maximum number of blocking worker calls run at once
         """
         self.worker = worker
+        # Coroutine workers are awaited on the loop; sync ones run in the executor
+        self._worker_call_is_async = inspect.iscoroutinefunction(getattr(worker, "call", None))
         self.host = host
         self.port = port
         self.clients: Dict[str, ClientConnection] = {}
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        # Blocking worker calls run on self.executor; credential checks and
+        # worker start/stop get their own small pool so a busy worker can't
+        # keep new clients from authenticating.
+        self.executor = ThreadPoolExecutor(max_workers=worker_concurrency, thread_name_prefix="WorkerAPI-worker")
+        self._control_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="WorkerAPI-control")
         self.heartbeat_interval = 30  # seconds
         self.connection_timeout = 300  # 5 minutes
+        # Buffer sizes for each connection. Sends only wait for the socket to
+        # drain past write_limit (also the backlog beyond which broadcast()
+        # skips a client); read_limit sizes the incoming stream buffer.
+        self.write_limit = 1024 * 1024  # bytes
+        self.read_limit = 1024 * 1024  # bytes
+        # Incoming messages buffered per connection while the previous one is
+        # handled; past this the client is throttled by TCP flow control
+        self.max_queue = 16
+        # Streamed chunks produced within this window are sent as one frame;
+        # 0 only merges chunks that are already queued.
+        self.stream_flush_interval = 0.01  # seconds
         self.is_running = False
+        self._started_at: Optional[float] = None
+        # Set by stop(); created in start() since it needs the running loop,
+        # which is kept so the event can be set from other threads
+        self._stop_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         # Always require API key regardless of passed value
         self.require_api_key = True
         # Initialize verifiers
         self.api_verifier = ApiKeyVerifier(base_url=api_base_url)
         self.jwt_verifier = JWTVerifier(base_url=api_base_url)
+        # API keys that verified successfully recently, oldest first, so
+        # reconnecting clients skip the backend round trip
+        self.credential_cache_ttl = 300  # seconds
+        self.credential_cache_size = 1024
+        self._credential_cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._pending_verifications: Dict[Tuple[str, str], asyncio.Future] = {}
         
         logger.info(f"WorkerAPI initialized on {host}:{port}")
         logger.info(f"Heartbeat interval: {self.heartbeat_interval}s, Connection timeout: {self.connection_timeout}s")
@@ -116,14 +257,17 @@ class WorkerAPI:
         """Start the WebSocket server"""
         logger.info("Starting WebSocket server...")
         self.is_running = True
+        self._started_at = time.time()
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
         
         # Start worker if it has a start method
         if hasattr(self.worker, 'start'):
-            await asyncio.get_event_loop().run_in_executor(self.executor, self.worker.start)
+            await asyncio.get_running_loop().run_in_executor(self._control_executor, self.worker.start)
             logger.info("Worker started")
         
         # Start heartbeat task
-        asyncio.create_task(self._heartbeat_task())
+        heartbeat = asyncio.create_task(self._heartbeat_task())
         
         # Start server
         async with websockets.serve(
@@ -133,19 +277,46 @@ class WorkerAPI:
             ping_interval=20,
             ping_timeout=60,
             close_timeout=10,
-            max_size=50 * 1024 * 1024  # 50MB max message size
+            max_size=50 * 1024 * 1024,  # 50MB max message size
+            # Let bursts of stream frames sit in the transport buffer instead
+            # of pausing the sender at the 64KiB default high-water mark.
+            # Nothing but the close frame is written before authentication.
+            write_limit=self.write_limit,
+            read_limit=self.read_limit,
+            max_queue=self.max_queue
         ):
             logger.info(f"WebSocket server started on ws://{self.host}:{self.port}")
             logger.info("Server ready to accept connections")
             
-            # Keep server running
-            while self.is_running:
-                await asyncio.sleep(1)
+            # Keep server running until stop()
+            await self._stop_event.wait()
+        
+        await heartbeat
+    
+    def run(self):
+        """
+        Start the server and block until it stops.
+        
+        Runs on uvloop when it is installed (it isn't available on Windows);
+        the many small sends of streamed responses are noticeably cheaper
+        there than on the default asyncio loop.
+        """
+        install_uvloop()
+        asyncio.run(self.start())
     
     async def stop(self):
-        """Stop the WebSocket server"""
+        """Stop the WebSocket server
+        
+        The server is always told to stop through its own loop, but client
+        sockets are closed on the caller's loop, so await this on the loop
+        running start(); from another thread, submit it there with
+        asyncio.run_coroutine_threadsafe().
+        """
         logger.info("Stopping WebSocket server...")
         self.is_running = False
+        loop = self._loop
+        if self._stop_event is not None and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._stop_event.set)
         
         # Disconnect all clients
         for client in list(self.clients.values()):
@@ -158,12 +329,37 @@ class WorkerAPI:
         
         # Stop worker
         if hasattr(self.worker, 'stop'):
-            await asyncio.get_event_loop().run_in_executor(self.executor, self.worker.stop)
+            await asyncio.get_running_loop().run_in_executor(self._control_executor, self.worker.stop)
             logger.info("Worker stopped")
         
         self.executor.shutdown(wait=True)
+        self._control_executor.shutdown(wait=True)
         logger.info("WebSocket server stopped")
     
+    def broadcast(self, message: WebSocketMessage):
+        """
+        Send a message to every connected client.
+        
+        The message is serialized once and written to each connection
+        without awaiting; clients whose connection is closed, or that
+        already have more than the write limit buffered, are skipped rather
+        than slowing down the others or growing their backlog further.
+        """
+        clients = []
+        for client in self.clients.values():
+            # websockets.broadcast silently skips closed connections, so leave
+            # them out here too and keep message_count accurate
+            if not client.websocket.open:
+                continue
+            transport = getattr(client.websocket, "transport", None)
+            if transport is not None and transport.get_write_buffer_size() > self.write_limit:
+                logger.warning("Skipping broadcast to backed-up client %s", client.client_id)
+                continue
+            clients.append(client)
+        websockets.broadcast([client.websocket for client in clients], message.to_json())
+        for client in clients:
+            client.message_count += 1
+    
     async def _handle_client(self, websocket, path):
         """Handle new client connections"""
         # Authentication: accept either API key (for scripts/console) or JWT (for browsers)
@@ -197,18 +393,17 @@ class WorkerAPI:
 
         # Verify provided credential
         try:
-            loop = asyncio.get_event_loop()
             if api_key:
-                result = await loop.run_in_executor(self.executor, self.api_verifier.verify_api_key, api_key)
-                if not result or not result.get('is_valid'):
+                if not await self._verify_credential("api_key", api_key, self.api_verifier.verify_api_key):
                     logger.warning("Invalid API key. Closing connection.")
                     try:
                         await websocket.close(code=4403, reason="Invalid API key")
                     finally:
                         return
             else:
-                result = await loop.run_in_executor(self.executor, self.jwt_verifier.verify_jwt, bearer_token)
-                if not result or not result.get('is_valid'):
+                # JWTs expire and can be revoked, so they are checked on
+                # every connection instead of being cached
+                if not await self._verify_credential("jwt", bearer_token, self.jwt_verifier.verify_jwt, cache=False):
                     logger.warning("Invalid JWT. Closing connection.")
                     try:
                         await websocket.close(code=4403, reason="Invalid JWT")
@@ -225,15 +420,11 @@ class WorkerAPI:
         client = ClientConnection(websocket, client_id)
         self.clients[client_id] = client
         
-        logger.info(f"Client {client_id} connected from {websocket.remote_address}")
+        logger.info("Client %s connected from %s", client_id, websocket.remote_address)
         
         try:
             # Send welcome message
-            await client.send_message(WebSocketMessage(
-                type=MessageType.CONNECT,
-                id=str(uuid.uuid4()),
-                data={"message": "Connection established. Ready to process requests."}
-            ))
+            await client.send_welcome()
             
             # Handle client messages
             async for message in websocket:
@@ -244,27 +435,71 @@ class WorkerAPI:
                     await client.send_error(f"Message processing error: {str(e)}")
                     
         except websockets.exceptions.ConnectionClosed:
-            logger.info(f"Client {client_id} disconnected normally")
+            logger.info("Client %s disconnected normally", client_id)
         except Exception as e:
             logger.error(f"Error handling client {client_id}: {e}")
         finally:
             # Clean up client
-            if client_id in self.clients:
-                del self.clients[client_id]
-                logger.info(f"Client {client_id} cleaned up. Active connections: {len(self.clients)}")
+            if self.clients.pop(client_id, None) is not None:
+                logger.info("Client %s cleaned up. Active connections: %d", client_id, len(self.clients))
+    
+    async def _verify_credential(
+        self, kind: str, value: str, verify: Callable[[str], Any], cache: bool = True
+    ) -> bool:
+        """
+        Check a credential with its (blocking) verifier.
+        
+        With ``cache`` set, valid credentials are remembered for
+        credential_cache_ttl seconds; invalid ones are never cached, so a
+        newly issued key works at once. Concurrent checks of the same
+        credential share one backend call either way.
+        """
+        key = (kind, value)
+        credential_cache = self._credential_cache
+        if cache:
+            expiry = credential_cache.get(key)
+            if expiry is not None:
+                if expiry > time.monotonic():
+                    credential_cache.move_to_end(key)
+                    return True
+                del credential_cache[key]
+        
+        pending = self._pending_verifications.get(key)
+        if pending is None:
+            pending = asyncio.get_running_loop().run_in_executor(self._control_executor, verify, value)
+            self._pending_verifications[key] = pending
+            pending.add_done_callback(lambda _: self._pending_verifications.pop(key, None))
+        # Shielded so one client dropping mid-check doesn't fail the others
+        result = await asyncio.shield(pending)
+        
+        if not result or not result.get('is_valid'):
+            return False
+        if cache:
+            credential_cache[key] = time.monotonic() + self.credential_cache_ttl
+            credential_cache.move_to_end(key)
+            while len(credential_cache) > self.credential_cache_size:
+                credential_cache.popitem(last=False)
+        return True
     
     async def _process_message(self, client: ClientConnection, raw_message: str):
         """Process incoming message from client"""
         client.update_activity()
         
         try:
-            message = WebSocketMessage.from_json(raw_message)
-            logger.debug(f"Received {message.type.value} from {client.client_id}")
+            data = decode_json(raw_message)
+            
+            # Heartbeats only need their id echoed, so they skip building a
+            # WebSocketMessage
+            if data.get("type") == "heartbeat":
+                logger.debug("Received heartbeat from %s", client.client_id)
+                await self._handle_heartbeat(client, data["id"])
+                return
+            
+            message = WebSocketMessage.from_dict(data)
+            logger.debug("Received %s from %s", message.type.value, client.client_id)
             
             if message.type == MessageType.MESSAGE:
                 await self._handle_worker_message(client, message)
-            elif message.type == MessageType.HEARTBEAT:
-                await self._handle_heartbeat(client, message)
             else:
                 logger.warning(f"Unknown message type: {message.type.value}")
         
@@ -288,7 +523,7 @@ class WorkerAPI:
         client.is_processing = True
         content = message.data.get("content", "")
         
-        logger.info(f"Processing message from {client.client_id}: {content[:50]}...")
+        logger.debug("Processing message from %s: %.50s...", client.client_id, content)
         
         try:
             # Check if worker supports streaming
@@ -306,128 +541,118 @@ class WorkerAPI:
     async def _handle_streaming_worker(self, client: ClientConnection, content: str, message_id: str):
         """Handle streaming worker response with immediate WebSocket streaming"""
         
-        def stream_callback(chunk):
-            """Callback for streaming chunks - processes immediately"""
-            # Convert chunk to string format
-            if isinstance(chunk, dict):
-                if chunk.get("type") == "text":
-                    return chunk.get("text", "")
-                elif chunk.get("type") == "task":
-                    return f"[TOOL] {chunk.get('title', '')}: {chunk.get('text', '')}"
-                else:
-                    return str(chunk)
-            else:
-                return str(chunk)
+        # Chunks produced on the worker thread are handed to this loop through
+        # a queue and sent by a single consumer, so they go out in order and
+        # send failures surface here instead of in detached tasks. The worker
+        # holds a slot per queued chunk, so a slow client blocks the worker
+        # instead of letting the backlog grow without bound.
+        main_loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        slots = threading.Semaphore(_STREAM_QUEUE_CHUNKS)
+        abandoned = threading.Event()
         
-        # Use asyncio synchronization for immediate delivery
-        import asyncio
-        from concurrent.futures import ThreadPoolExecutor
+        def sync_callback(chunk):
+            if abandoned.is_set():
+                return
+            processed = _format_chunk(chunk)
+            if not processed:
+                return
+            while not slots.acquire(timeout=1):
+                if abandoned.is_set():
+                    return
+            main_loop.call_soon_threadsafe(queue.put_nowait, processed)
         
-        # Capture the main event loop before entering thread pool
-        main_loop = asyncio.get_event_loop()
+        def worker_task():
+            try:
+                return self.worker.call_stream(content, sync_callback)
+            finally:
+                main_loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
         
-        # Create a custom executor for this specific task
-        with ThreadPoolExecutor(max_workers=1) as executor:
+        try:
+            worker_future = main_loop.run_in_executor(self.executor, worker_task)
+            flush_interval = self.stream_flush_interval
             
-            # Event to signal when worker is done
-            worker_done = asyncio.Event()
-            result_container = {"result": None, "error": None}
+            finished = False
+            while not finished:
+                chunk = await queue.get()
+                if chunk is _STREAM_END:
+                    break
+                if flush_interval > 0 and len(chunk) < _STREAM_COALESCE_CHARS:
+                    await asyncio.sleep(flush_interval)
+                taken = 0
+                if not queue.empty():
+                    chunk, taken, finished = _drain_chunks(queue, chunk)
+                for _ in range(taken + 1):
+                    slots.release()
+                await client.send_stream(chunk, message_id)
             
-            def worker_task():
-                try:
-                    def sync_callback(chunk):
-                        # Process chunk immediately
-                        processed = stream_callback(chunk)
-                        if processed:
-                            # Schedule immediate WebSocket send using the main event loop
-                            main_loop.call_soon_threadsafe(
-                                lambda: asyncio.create_task(
-                                    client.send_stream(processed, message_id)
-                                )
-                            )
-                            logger.debug(f"Scheduled immediate chunk send: {processed[:50]}...")
-                    
-                    result = self.worker.call_stream(content, sync_callback)
-                    result_container["result"] = result
-                except Exception as e:
-                    result_container["error"] = e
-                finally:
-                    # Signal completion using the main event loop
-                    main_loop.call_soon_threadsafe(worker_done.set)
+            result = await worker_future
             
-            try:
-                # Start worker in thread pool
-                future = executor.submit(worker_task)
-                
-                # Wait for worker to complete
-                await worker_done.wait()
-                
-                # Check for errors
-                if result_container["error"]:
-                    raise result_container["error"]
-                
-                # Send completion
-                await client.send_complete(result_container["result"] or "", None)
+            # Send completion
+            await client.send_complete(result or "", None)
+            
+            logger.debug("Immediate streaming completed for %s", client.client_id)
                 
-                logger.info(f"Immediate streaming completed for {client.client_id}")
-                    
-            except Exception as e:
-                logger.error(f"Streaming error for {client.client_id}: {e}")
-                await client.send_complete("", str(e))
+        except Exception as e:
+            logger.error(f"Streaming error for {client.client_id}: {e}")
+            await client.send_complete("", str(e))
+        finally:
+            # Nobody reads the queue any more; don't leave the worker blocked
+            abandoned.set()
     
     async def _handle_simple_worker(self, client: ClientConnection, content: str, message_id: str):
         """Handle simple worker response"""
         try:
-            # Run worker in executor
-            result = await asyncio.get_event_loop().run_in_executor(
-                self.executor, self.worker.call, content
-            )
+            if self._worker_call_is_async:
+                result = await self.worker.call(content)
+            else:
+                # Run blocking worker in executor to keep the loop responsive
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.worker.call, content
+                )
             
             await client.send_complete(result or "", None)
-            logger.info(f"Simple worker completed for {client.client_id}")
+            logger.debug("Simple worker completed for %s", client.client_id)
             
         except Exception as e:
             logger.error(f"Simple worker error for {client.client_id}: {e}")
             await client.send_complete("", str(e))
     
-    async def _handle_heartbeat(self, client: ClientConnection, message: WebSocketMessage):
+    async def _handle_heartbeat(self, client: ClientConnection, message_id: str):
         """Handle heartbeat message"""
-        response = WebSocketMessage(
-            type=MessageType.HEARTBEAT,
-            id=message.id,
-            data={"status": "alive", "timestamp": time.time()}
-        )
-        await client.send_message(response)
+        await client.send_heartbeat(message_id)
     
     async def _heartbeat_task(self):
         """Background task to monitor client connections"""
         while self.is_running:
             try:
                 current_time = time.time()
-                disconnected_clients = []
-                
-                for client_id, client in self.clients.items():
-                    # Check for timeout
-                    if current_time - client.last_activity > self.connection_timeout:
-                        logger.warning(f"Client {client_id} timed out")
-                        disconnected_clients.append(client_id)
-                        try:
-                            await client.websocket.close()
-                        except:
-                            pass
+                timed_out = [
+                    client for client in self.clients.values()
+                    if current_time - client.last_activity > self.connection_timeout
+                ]
                 
-                # Clean up disconnected clients
-                for client_id in disconnected_clients:
-                    if client_id in self.clients:
-                        del self.clients[client_id]
+                # Close timed-out clients concurrently so one slow closing
+                # handshake doesn't hold up the rest of the sweep
+                for client in timed_out:
+                    logger.warning("Client %s timed out", client.client_id)
+                    self.clients.pop(client.client_id, None)
+                if timed_out:
+                    await asyncio.gather(
+                        *(client.websocket.close() for client in timed_out),
+                        return_exceptions=True
+                    )
                 
                 if len(self.clients) > 0:
-                    logger.debug(f"Active connections: {len(self.clients)}")
+                    logger.debug("Active connections: %d", len(self.clients))
                 
             except Exception as e:
                 logger.error(f"Error in heartbeat task: {e}")
             
-            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.heartbeat_interval)
+            except asyncio.TimeoutError:
+                pass
     
     def get_status(self) -> Dict[str, Any]:
         """Get server status information"""
@@ -436,7 +661,7 @@ class WorkerAPI:
                 "running": self.is_running,
                 "host": self.host,
                 "port": self.port,
-                "uptime": time.time() - (self.clients[list(self.clients.keys())[0]].connected_at if self.clients else time.time())
+                "uptime": time.time() - self._started_at if self._started_at is not None else 0
             },
             "connections": {
                 "active": len(self.clients),
@@ -5,11 +5,20 @@ This client wraps `WorkerRouter` and checks API key validity via `ApiKeyVerifier
 before allowing any interaction.
 """
 
-from typing import Optional, Callable
+import threading
+import time
+from typing import Dict, Optional, Callable, Tuple
 
 from .router import WorkerRouter
 from ..utils.api_key import ApiKeyVerifier
 
+# Successful API key verifications, keyed by (api_key, api_base_url) and
+# mapped to their expiry time, so repeated clients in one process skip the
+# HTTPS round trip. Failures are never cached.
+_VERIFY_CACHE_TTL = 600
+_VERIFY_CACHE: Dict[Tuple[str, Optional[str]], float] = {}
+_VERIFY_CACHE_LOCK = threading.Lock()
+
 
 class WorkerClient:
     """Client for interacting with workers with API key enforcement."""
@@ -20,21 +29,38 @@ class WorkerClient:
         worker_ip: str,
         worker_port: int,
         api_base_url: Optional[str] = None,
+        verify_once: bool = True,
     ) -> None:
         self.api_key = api_key
         self.worker_ip = worker_ip
         self.worker_port = worker_port
+        self.api_base_url = api_base_url
+        self.verify_once = verify_once
         self.api_verifier = ApiKeyVerifier(base_url=api_base_url)
         self.router = WorkerRouter(worker_ip, worker_port, api_key=api_key)
 
         self._ensure_valid_api_key()
 
     def _ensure_valid_api_key(self) -> None:
+        """Verify the API key, reusing a recent successful verification when
+        ``verify_once`` is set. Pass ``verify_once=False`` to always hit the API."""
+        key = (self.api_key, self.api_base_url)
+        if self.verify_once:
+            with _VERIFY_CACHE_LOCK:
+                expires = _VERIFY_CACHE.get(key)
+            if expires is not None and expires > time.monotonic():
+                return
+
         result = self.api_verifier.verify_api_key(self.api_key)
         if not result or not result.get("is_valid"):
+            with _VERIFY_CACHE_LOCK:
+                _VERIFY_CACHE.pop(key, None)
             message = result.get("message") if isinstance(result, dict) else "Invalid API key"
             raise PermissionError(message or "Invalid API key")
 
+        with _VERIFY_CACHE_LOCK:
+            _VERIFY_CACHE[key] = time.monotonic() + _VERIFY_CACHE_TTL
+
     def call(self, message: str, stream_callback: Optional[Callable[[str], None]] = None) -> str:
         """Send a message to the worker and return its response. Requires valid API key."""
         # API key was already validated on init; callers can create per-call verification if desired
@@ -0,0 +1,128 @@
+"""
+Tests for AppAPI message handling
+
+Handlers are driven directly with a recording socket in place of a real
+WebSocket connection.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from autoppia.src.apps.app_api import AppAPI
+
+
+class _FakeApp:
+    def __init__(self):
+        self.workers = {"alpha": object()}
+
+    def get_app_info(self):
+        return {"name": "test", "workers": list(self.workers)}
+
+    def get_ui_config(self):
+        return {}
+
+    def get_workers(self):
+        return list(self.workers)
+
+    def register_worker(self, name, worker):
+        self.workers[name] = worker
+
+    def call(self, message):
+        return message
+
+
+class _StreamingApp(_FakeApp):
+    def call_stream(self, message, send_message, worker_name=None):
+        time.sleep(0.3 if message == "slow" else 0.0)
+        send_message(message)
+        return message
+
+
+class _RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, payload):
+        self.sent.append(json.loads(payload))
+
+
+def _make_api(app):
+    api = AppAPI(app, port=0)
+    socket = _RecordingSocket()
+    api.active_connections["1"] = socket
+    return api, socket
+
+
+def _shutdown(api):
+    api.executor.shutdown(wait=False)
+    api._control_executor.shutdown(wait=False)
+
+
+@pytest.fixture
+def app_api():
+    api, socket = _make_api(_FakeApp())
+    yield api, socket
+    _shutdown(api)
+
+
+@pytest.fixture
+def streaming_api():
+    api, socket = _make_api(_StreamingApp())
+    api.stream_flush_interval = 0
+    yield api, socket
+    _shutdown(api)
+
+
+def _deliver(api, *messages):
+    """Hand messages to the API the way websocket_endpoint does, one task each"""
+    async def main():
+        ordering = asyncio.Lock()
+        await asyncio.gather(*(
+            api.handle_message("1", json.dumps(message), ordering) for message in messages
+        ))
+
+    asyncio.run(main())
+
+
+def test_info_includes_worker_registered_after_first_request(app_api):
+    api, socket = app_api
+
+    def request(action):
+        asyncio.run(api.handle_message("1", {"action": action}))
+        return socket.sent[-1]["data"]
+
+    assert list(request("get_workers")["workers"]) == ["alpha"]
+    assert request("get_app_info")["app_info"]["workers"] == ["alpha"]
+
+    api.app.register_worker("beta", object())
+
+    assert list(request("get_workers")["workers"]) == ["alpha", "beta"]
+    assert request("get_app_info")["app_info"]["workers"] == ["alpha", "beta"]
+    http = asyncio.run(api.handle_get_workers_http(None))
+    assert list(http["workers"]) == ["alpha", "beta"]
+
+
+def test_calls_from_one_client_complete_in_arrival_order(streaming_api):
+    api, socket = streaming_api
+    _deliver(api, {"message": "slow"}, {"message": "fast"})
+
+    results = [frame["data"]["result"] for frame in socket.sent if frame["type"] == "complete"]
+    assert results == ["slow", "fast"]
+    # The fast call's stream did not interleave with the slow one
+    streamed = [frame["data"]["content"] for frame in socket.sent if frame["type"] == "stream"]
+    assert streamed == ["slow", "fast"]
+
+
+def test_action_answered_while_call_is_running(streaming_api):
+    api, socket = streaming_api
+    _deliver(api, {"message": "slow"}, {"action": "get_workers"})
+
+    types = [frame["type"] for frame in socket.sent]
+    assert types.index("workers") < types.index("complete")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
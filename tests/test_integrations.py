@@ -0,0 +1,316 @@
+"""
+Tests for integration implementations
+
+External services are replaced by in-memory fakes, so these tests check
+connection handling and response parsing without a network.
+"""
+
+import threading
+import time
+
+import pytest
+
+from autoppia.src.integrations.config import IntegrationConfig
+from autoppia.src.integrations.implementations.database import postgres_integration
+
+
+class _FakeCursor:
+    delay = 0.0
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        if sql == "bad":
+            raise RuntimeError("syntax error")
+        time.sleep(self.delay)
+        self.conn.pending.append(sql)
+        self.description = [("col",)] if sql.lower().startswith("select") else None
+
+    def fetchall(self):
+        if self.description is None:
+            raise RuntimeError("no results to fetch")
+        return [(1,)]
+
+
+class _FakeConnection:
+    def __init__(self, database):
+        self.database = database
+        self.pending = []
+        self.closed = 0
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def commit(self):
+        self.database.committed.extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+
+class _FakePool:
+    """ThreadedConnectionPool stand-in that raises when exhausted, like the real one"""
+
+    instances = []
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.maxconn = maxconn
+        self.kwargs = kwargs
+        self.committed = []
+        self.in_use = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        _FakePool.instances.append(self)
+
+    def getconn(self):
+        with self.lock:
+            if self.in_use >= self.maxconn:
+                raise RuntimeError("connection pool exhausted")
+            self.in_use += 1
+            self.peak = max(self.peak, self.in_use)
+        return _FakeConnection(self)
+
+    def putconn(self, conn, close=False):
+        with self.lock:
+            self.in_use -= 1
+
+    def closeall(self):
+        pass
+
+
+@pytest.fixture
+def postgres(monkeypatch):
+    monkeypatch.setattr(postgres_integration, "ThreadedConnectionPool", _FakePool)
+    _FakePool.instances.clear()
+
+    def make(**attributes):
+        config = IntegrationConfig("PostgreSQL", "database", {"host": "db", **attributes})
+        return postgres_integration.PostgresIntegration(config)
+
+    return make
+
+
+def test_postgres_select_returns_rows(postgres):
+    db = postgres()
+    assert db.execute_sql("SELECT 1") == [(1,)]
+    assert db.execute_sql("bad") is None
+
+
+def test_postgres_write_commits_only_when_asked(postgres):
+    db = postgres()
+    assert db.execute_sql("INSERT INTO t VALUES (1)") == []
+    assert db.execute_sql("INSERT INTO t VALUES (2)", commit=True) == []
+    assert _FakePool.instances[0].committed == ["INSERT INTO t VALUES (2)"]
+
+
+def test_postgres_waits_for_free_connection(postgres, monkeypatch):
+    db = postgres(max_connections="2")
+    assert db.max_connections == 2
+    monkeypatch.setattr(_FakeCursor, "delay", 0.02)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(db.execute_sql("SELECT 1"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[(1,)]] * 8
+    assert _FakePool.instances[0].peak == 2
+
+
+def test_postgres_rejects_invalid_pool_size(postgres):
+    with pytest.raises(ValueError):
+        postgres(max_connections="0")
+
+
+class _FakeSMTP:
+    """SMTP_SSL stand-in that records sessions and catches overlapping sends"""
+
+    sessions = []
+
+    def __init__(self, host, port):
+        self.alive = True
+        self.sent = []
+        self.busy = False
+        self.overlapped = False
+        self.closed = False
+        _FakeSMTP.sessions.append(self)
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        if not self.alive:
+            raise OSError("connection reset")
+        return (250, b"OK")
+
+    def send_message(self, msg):
+        if self.busy:
+            self.overlapped = True
+        self.busy = True
+        time.sleep(0.01)
+        self.sent.append(msg["Subject"])
+        self.busy = False
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeIMAP:
+    """IMAP4_SSL stand-in serving a fixed mailbox"""
+
+    sessions = []
+    messages = []
+
+    def __init__(self, host, port):
+        self.alive = True
+        self.fetches = []
+        self.logged_out = False
+        _FakeIMAP.sessions.append(self)
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        if not self.alive:
+            raise OSError("connection reset")
+        return ("OK", [b""])
+
+    def select(self, mailbox):
+        return ("OK", [str(len(self.messages)).encode()])
+
+    def search(self, charset, criterion):
+        return ("OK", [b" ".join(str(i + 1).encode() for i in range(len(self.messages)))])
+
+    def fetch(self, message_set, parts):
+        self.fetches.append((message_set, parts))
+        data = []
+        for number in message_set.split(","):
+            raw = self.messages[int(number) - 1]
+            data.append((f"{number} (BODY[] {{{len(raw)}}}".encode(), raw))
+            data.append(b")")
+        return ("OK", data)
+
+    def logout(self):
+        self.logged_out = True
+
+
+@pytest.fixture
+def mailbox(monkeypatch):
+    from autoppia.src.integrations.implementations.email import smtp_integration
+
+    monkeypatch.setattr(smtp_integration.smtplib, "SMTP_SSL", _FakeSMTP)
+    monkeypatch.setattr(smtp_integration.imaplib, "IMAP4_SSL", _FakeIMAP)
+    _FakeSMTP.sessions.clear()
+    _FakeIMAP.sessions.clear()
+    _FakeIMAP.messages = []
+
+    config = IntegrationConfig("SMTP", "email", {
+        "SMTP Server": "smtp.test",
+        "SMTP Port": 465,
+        "IMAP Server": "imap.test",
+        "IMAP Port": 993,
+        "email": "me@test",
+        "password": "secret",
+    })
+    integration = smtp_integration.SMPTEmailIntegration(config)
+    yield integration
+    integration.close()
+
+
+def test_smtp_session_reused(mailbox):
+    assert mailbox.send_email("you@test", "one", "body")
+    assert mailbox.send_email("you@test", "two", "body")
+    assert len(_FakeSMTP.sessions) == 1
+    assert _FakeSMTP.sessions[0].sent == ["one", "two"]
+
+
+def test_smtp_reconnects_after_failed_noop(mailbox):
+    assert mailbox.send_email("you@test", "one", "body")
+    _FakeSMTP.sessions[0].alive = False
+    assert mailbox.send_email("you@test", "two", "body")
+    assert len(_FakeSMTP.sessions) == 2
+    assert _FakeSMTP.sessions[0].closed
+    assert _FakeSMTP.sessions[1].sent == ["two"]
+
+
+def test_smtp_concurrent_sends_share_one_session(mailbox):
+    threads = [
+        threading.Thread(target=mailbox.send_email, args=("you@test", f"m{i}", "body"))
+        for i in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(_FakeSMTP.sessions) == 1
+    assert sorted(_FakeSMTP.sessions[0].sent) == [f"m{i}" for i in range(5)]
+    assert not _FakeSMTP.sessions[0].overlapped
+
+
+def test_close_ends_sessions_and_next_call_reconnects(mailbox):
+    assert mailbox.send_email("you@test", "one", "body")
+    assert mailbox.read_emails() == []
+    mailbox.close()
+
+    assert mailbox._smtp is None and mailbox._imap is None
+    assert _FakeSMTP.sessions[0].closed
+    assert _FakeIMAP.sessions[0].logged_out
+
+    assert mailbox.send_email("you@test", "two", "body")
+    assert len(_FakeSMTP.sessions) == 2
+
+
+def test_imap_session_reused_and_reconnected(mailbox):
+    assert mailbox.read_emails() == []
+    assert mailbox.read_emails() == []
+    assert len(_FakeIMAP.sessions) == 1
+
+    _FakeIMAP.sessions[0].alive = False
+    assert mailbox.read_emails() == []
+    assert len(_FakeIMAP.sessions) == 2
+
+
+def test_read_emails_fetches_recent_messages_in_one_peek(mailbox):
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    latin = MIMEMultipart()
+    latin["From"] = "b@test"
+    latin["Subject"] = "latin"
+    latin.attach(MIMEText("héllo", "plain", "iso-8859-1"))
+
+    utf8 = MIMEText("ñandú", "plain", "utf-8")
+    utf8["From"] = "c@test"
+    utf8["Subject"] = "utf8"
+
+    _FakeIMAP.messages = [
+        b"From: a@test\r\nSubject: old\r\n\r\nskipped",
+        latin.as_bytes(),
+        utf8.as_bytes(),
+        b"From: d@test\r\nSubject: bogus\r\nContent-Type: text/plain; charset=x-unknown\r\n\r\nplain",
+    ]
+
+    emails = mailbox.read_emails(num=3)
+
+    assert [(e["From"], e["Subject"], e["Body"]) for e in emails] == [
+        ("b@test", "latin", "héllo"),
+        ("c@test", "utf8", "ñandú"),
+        ("d@test", "bogus", "plain"),
+    ]
+    # One FETCH for all three, using PEEK so messages are not marked \Seen
+    assert _FakeIMAP.sessions[0].fetches == [("2,3,4", "(BODY.PEEK[])")]
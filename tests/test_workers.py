@@ -0,0 +1,186 @@
+"""
+Tests for worker communication
+
+Covers WorkerRouter against a local WebSocket server and the WorkerAPI
+credential cache.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+import websockets
+
+from autoppia.src.workers.models import STREAM_FRAME_PREFIXES, MessageType, WebSocketMessage
+from autoppia.src.workers.router import WorkerRouter, WorkerError
+from autoppia.src.workers.worker_api import ClientConnection, WorkerAPI
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(handler):
+    """Serve ``handler`` on a background thread and return its port"""
+    port = _free_port()
+    ready = threading.Event()
+
+    async def main():
+        async with websockets.serve(handler, "127.0.0.1", port):
+            ready.set()
+            await asyncio.Future()
+
+    threading.Thread(target=asyncio.run, args=(main(),), daemon=True).start()
+    assert ready.wait(5)
+    return port
+
+
+def _frame(type_, id_, data):
+    return json.dumps({"type": type_, "id": id_, "data": data, "timestamp": time.time()})
+
+
+@pytest.fixture
+def stream_server():
+    """Worker that streams five chunks in a burst, then completes"""
+    requests = []
+
+    async def handler(ws, path=None):
+        await ws.send(_frame("connect", "conn-1", {"message": "hi"}))
+        async for raw in ws:
+            msg = json.loads(raw)
+            if msg["type"] != "message":
+                continue
+            requests.append(msg["data"]["content"])
+            for i in range(5):
+                await ws.send(_frame("stream", msg["id"], {"content": f"t{i} "}))
+            await ws.send(_frame("complete", msg["id"], {"result": "done:" + msg["data"]["content"], "error": None}))
+
+    return _start_server(handler), requests
+
+
+def _make_router(port):
+    router = WorkerRouter("127.0.0.1", port)
+    router.response_timeout = 10
+    router.retry_delay = 0
+    return router
+
+
+def test_stream_chunks_coalesced_and_delivered_before_return(stream_server):
+    port, _ = stream_server
+    router = _make_router(port)
+    router.stream_batch_window = 0.2
+    chunks = []
+
+    def callback(content):
+        time.sleep(0.05)
+        chunks.append(content)
+
+    try:
+        assert router.call("hello", callback) == "done:hello"
+        # Every chunk was handed to the callback before call() returned
+        assert "".join(chunks) == "t0 t1 t2 t3 t4 "
+        assert len(chunks) < 5
+    finally:
+        router.close()
+
+
+def test_call_after_close(stream_server):
+    port, _ = stream_server
+    router = _make_router(port)
+    chunks = []
+
+    try:
+        assert router.call("one", chunks.append) == "done:one"
+        router.close()
+        assert router.call("two", chunks.append) == "done:two"
+        assert "".join(chunks) == "t0 t1 t2 t3 t4 " * 2
+    finally:
+        router.close()
+
+
+def test_worker_error_not_retried():
+    attempts = []
+
+    async def handler(ws, path=None):
+        async for raw in ws:
+            msg = json.loads(raw)
+            attempts.append(msg["id"])
+            await ws.send(_frame("error", msg["id"], {"error": "bad input"}))
+
+    router = _make_router(_start_server(handler))
+    try:
+        with pytest.raises(WorkerError, match="bad input"):
+            router.call("hello")
+        assert len(attempts) == 1
+    finally:
+        router.close()
+
+
+class _RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, payload):
+        self.sent.append(payload)
+
+
+def test_stream_frames_match_router_prefix():
+    socket = _RecordingSocket()
+    client = ClientConnection(socket, "client-1")
+    asyncio.run(client.send_stream("hello", "stream-1"))
+    message = WebSocketMessage(MessageType.STREAM, "stream-1", {"content": "hello"})
+
+    frames = socket.sent + [message.to_json(), json.dumps(json.loads(message.to_json()))]
+    for frame in frames:
+        assert frame.startswith(STREAM_FRAME_PREFIXES)
+        assert WebSocketMessage.from_json(frame).type is MessageType.STREAM
+    assert json.loads(socket.sent[0])["data"] == {"content": "hello"}
+
+
+class _EchoWorker:
+    def call(self, message):
+        return message
+
+
+def test_credential_cache_expiry():
+    api = WorkerAPI(_EchoWorker(), port=_free_port())
+    api.credential_cache_ttl = 0.1
+    calls = []
+
+    def verify(value):
+        calls.append(value)
+        return {"is_valid": value == "good"}
+
+    async def check(*args, **kwargs):
+        return await api._verify_credential(*args, **kwargs)
+
+    try:
+        assert asyncio.run(check("api_key", "good", verify))
+        assert asyncio.run(check("api_key", "good", verify))
+        assert len(calls) == 1
+
+        time.sleep(0.15)
+        assert asyncio.run(check("api_key", "good", verify))
+        assert len(calls) == 2
+
+        # Failures are never cached
+        assert not asyncio.run(check("api_key", "bad", verify))
+        assert not asyncio.run(check("api_key", "bad", verify))
+        assert len(calls) == 4
+
+        # JWTs are verified on every connection
+        assert asyncio.run(check("jwt", "good", verify, cache=False))
+        assert asyncio.run(check("jwt", "good", verify, cache=False))
+        assert len(calls) == 6
+    finally:
+        api.executor.shutdown(wait=False)
+        api._control_executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])